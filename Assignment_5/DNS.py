@@ -6,10 +6,10 @@ print('Enter your option: 1. URL to IP  2. IP to URL')
 op = input('Enter Option: ')
 var = input('Enter URL/IP: ')
 
-addr1 = socket.gethostbyname(var)
-addr6 = socket.gethostbyaddr(var)
-
+# Only run the lookup that was asked for
 if op == '1':
+    addr1 = socket.gethostbyname(var)
     print(addr1)
 else:
+    addr6 = socket.gethostbyaddr(var)
     print(addr6)
@@ -0,0 +1,170 @@
+"""
+Bulk DNS resolver
+- Reads hostnames and/or IP addresses (one per line) and resolves them concurrently
+- Hostnames go through getaddrinfo, IPs through gethostbyaddr (PTR), both on a
+  thread pool; the per-query timeout starts when a thread picks the lookup up
+- Any error is recorded as a failed result for that query
+- A fixed set of worker coroutines pulls from a bounded queue, so memory stays
+  flat for very large input files
+- Each result is written as one JSON line (NDJSON) as soon as it completes
+
+Usage: python bulk_resolver.py INPUT [-o OUTPUT] [-c CONCURRENCY] [-t TIMEOUT]
+                               [--mode auto|forward|reverse] [--family any|4|6]
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CONCURRENCY = 256
+DEFAULT_TIMEOUT = 5.0
+ABANDONED_HEADROOM = 2  # executor threads per concurrency slot
+FAMILIES = {'any': socket.AF_UNSPEC, '4': socket.AF_INET, '6': socket.AF_INET6}
+
+
+def is_ip(text):
+    try:
+        ipaddress.ip_address(text)
+        return True
+    except ValueError:
+        return False
+
+
+def lookup_forward(name, family):
+    infos = socket.getaddrinfo(name, None, family=family, type=socket.SOCK_STREAM)
+    answers = []
+    for info in infos:
+        addr = info[4][0]
+        if addr not in answers:
+            answers.append(addr)
+    return answers
+
+
+def lookup_reverse(ip):
+    host, aliases, _ = socket.gethostbyaddr(ip)
+    return [host] + aliases
+
+
+async def run_lookup(loop, executor, timeout, func, *args):
+    """Run a blocking lookup on the executor. The timeout clock starts when a thread
+    picks the lookup up, not while it waits for a free thread. Returns (start, result)."""
+    started = loop.create_future()
+
+    def mark_started(when):
+        if not started.done():
+            started.set_result(when)
+
+    def call():
+        loop.call_soon_threadsafe(mark_started, time.perf_counter())
+        return func(*args)
+
+    lookup = loop.run_in_executor(executor, call)
+    await asyncio.wait([started, lookup], return_when=asyncio.FIRST_COMPLETED)
+    start = started.result() if started.done() else time.perf_counter()
+    # On timeout the thread keeps running until the OS resolver gives up ("abandoned")
+    return start, await asyncio.wait_for(lookup, max(0.0, start + timeout - time.perf_counter()))
+
+
+async def resolve_one(loop, query, mode='auto', family=socket.AF_UNSPEC, timeout=DEFAULT_TIMEOUT,
+                      executor=None):
+    """Resolve one query and return a result dict (never raises for lookup errors)."""
+    reverse = mode == 'reverse' or (mode == 'auto' and is_ip(query))
+    result = {"query": query, "type": "PTR" if reverse else "A/AAAA"}
+    start = time.perf_counter()
+    try:
+        if reverse:
+            start, answers = await run_lookup(loop, executor, timeout, lookup_reverse, query)
+        else:
+            start, answers = await run_lookup(loop, executor, timeout, lookup_forward, query, family)
+        result["answers"] = answers
+    except asyncio.TimeoutError:
+        result["error"] = "timeout"
+    except (socket.gaierror, socket.herror) as ex:
+        result["error"] = ex.strerror or str(ex)
+    except (OSError, UnicodeError) as ex:
+        result["error"] = str(ex)
+    except Exception as ex:  # one bad query must not take its worker down
+        result["error"] = f"{type(ex).__name__}: {ex}"
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+async def resolve_all(queries, out, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT,
+                      mode='auto', family=socket.AF_UNSPEC):
+    """Resolve every query from the iterable, writing NDJSON lines to out. Returns summary stats."""
+    loop = asyncio.get_running_loop()
+    # Timed-out lookups keep their thread until the OS resolver returns; the spare
+    # threads keep those abandoned lookups from starving new ones
+    executor = ThreadPoolExecutor(max_workers=concurrency * ABANDONED_HEADROOM)
+    queue = asyncio.Queue(maxsize=concurrency * 4)
+    stats = {"total": 0, "resolved": 0, "failed": 0, "timeouts": 0}
+
+    async def worker():
+        while True:
+            query = await queue.get()
+            if query is None:
+                return
+            result = await resolve_one(loop, query, mode, family, timeout, executor)
+            stats["total"] += 1
+            if "answers" in result:
+                stats["resolved"] += 1
+            else:
+                stats["failed"] += 1
+                if result["error"] == "timeout":
+                    stats["timeouts"] += 1
+            out.write(json.dumps(result) + "\n")
+
+    async def produce():
+        for line in queries:
+            query = line.strip()
+            if query and not query.startswith('#'):
+                await queue.put(query)
+        for _ in workers:
+            await queue.put(None)
+
+    start = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    tasks = workers + [asyncio.create_task(produce())]
+    try:
+        # A worker that dies (e.g. the output write fails) ends the run instead of
+        # leaving the producer blocked on a full queue
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["queries_per_sec"] = round(stats["total"] / elapsed, 1) if elapsed else 0.0
+    return stats
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve many hostnames / IPs concurrently")
+    parser.add_argument("input", help="file with one hostname or IP per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", help="NDJSON output file (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("-t", "--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per query")
+    parser.add_argument("--mode", choices=("auto", "forward", "reverse"), default="auto")
+    parser.add_argument("--family", choices=tuple(FAMILIES), default="any")
+    args = parser.parse_args()
+
+    src = sys.stdin if args.input == '-' else open(args.input)
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        stats = asyncio.run(resolve_all(src, out, args.concurrency, args.timeout,
+                                        args.mode, FAMILIES[args.family]))
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(stats), file=sys.stderr)
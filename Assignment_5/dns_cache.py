@@ -0,0 +1,217 @@
+"""
+TTL-aware DNS cache in front of dns_client.DNSClient
+- Entries are keyed by (name, type) and expire after the smallest answer TTL
+- NXDOMAIN and empty (NODATA) replies are cached negatively for the SOA
+  minimum TTL from the authority section (RFC 2308), or a default
+- LRU eviction once max_entries is reached
+- save() / load() snapshot the live entries to a JSON file (absolute expiry
+  times), so a rerun over mostly the same names starts warm
+- Hit / miss / negative-hit / eviction counters are exposed in .stats()
+
+Usage: python dns_cache.py NAMES_FILE [--type A] [--server IP] [--snapshot FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from dns_client import (DNSClient, DNSMessage, FLAG_QR, FLAG_RA, FLAG_RD, Question, Record,
+                        RCODE_NOERROR, RCODE_NXDOMAIN, TYPE_NAMES, type_code)
+
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_NEGATIVE_TTL = 300
+MAX_TTL = 86400
+
+
+def _record_from_json(fields):
+    name, rtype, ttl, data = fields
+    if rtype in ('MX', 'SOA'):
+        data = tuple(data)  # JSON turns these tuples into lists
+    return Record(name, rtype, ttl, data)
+
+
+class DNSCache:
+    """(name, type) -> (expires_at, rcode, records); records is empty for negative entries."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 max_ttl=MAX_TTL, clock=time.time):
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.max_ttl = max_ttl
+        self.clock = clock
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _key(name, qtype):
+        return name.rstrip('.').lower(), TYPE_NAMES.get(type_code(qtype), qtype)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, name, qtype):
+        """Return a DNSMessage rebuilt from cache (TTLs show the remaining time), or None."""
+        key = self._key(name, qtype)
+        entry = self._entries.get(key)
+        now = self.clock()
+        if entry is None or entry[0] <= now:
+            if entry is not None:
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        expires_at, rcode, records = entry
+        if records:
+            self.hits += 1
+        else:
+            self.negative_hits += 1
+        remaining = int(expires_at - now)
+        answers = [Record(r.name, r.type, remaining, r.data) for r in records]
+        return DNSMessage(0, FLAG_QR | FLAG_RD | FLAG_RA | rcode, [Question(*key)], answers, [], [])
+
+    def put(self, name, qtype, rcode, records, ttl):
+        key = self._key(name, qtype)
+        ttl = min(ttl, self.max_ttl)
+        if ttl <= 0:
+            return
+        self._entries[key] = (self.clock() + ttl, rcode, list(records))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def put_message(self, name, qtype, msg):
+        """Cache a reply: positive with min answer TTL, negative for NXDOMAIN / NODATA.
+        Other rcodes (SERVFAIL, REFUSED, ...) are not cached."""
+        if msg.rcode == RCODE_NOERROR and msg.answers:
+            self.put(name, qtype, msg.rcode, msg.answers, min(r.ttl for r in msg.answers))
+        elif msg.rcode in (RCODE_NOERROR, RCODE_NXDOMAIN):
+            ttl = self.negative_ttl
+            for r in msg.authority:
+                if r.type == 'SOA':
+                    ttl = min(r.ttl, r.data[-1])
+                    break
+            self.put(name, qtype, msg.rcode, [], ttl)
+
+    def purge_expired(self):
+        now = self.clock()
+        expired = [k for k, (expires_at, _, _) in self._entries.items() if expires_at <= now]
+        for k in expired:
+            del self._entries[k]
+        self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    #  SNAPSHOT
+
+    def save(self, path):
+        """Write live entries (least recently used first) to path atomically."""
+        now = self.clock()
+        entries = [
+            [name, qtype, expires_at, rcode, [list(r) for r in records]]
+            for (name, qtype), (expires_at, rcode, records) in self._entries.items()
+            if expires_at > now
+        ]
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({"version": 1, "saved_at": now, "entries": entries}, f)
+        os.replace(tmp, path)
+        return len(entries)
+
+    def load(self, path):
+        """Warm the cache from a snapshot, skipping entries that have expired since.
+        Returns the number of entries loaded (0 if the file does not exist)."""
+        if not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            snapshot = json.load(f)
+        now = self.clock()
+        loaded = 0
+        for name, qtype, expires_at, rcode, records in snapshot.get("entries", []):
+            if expires_at <= now:
+                continue
+            records = [_record_from_json(r) for r in records]
+            self._entries[(name, qtype)] = (expires_at, rcode, records)
+            loaded += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return loaded
+
+
+class CachingResolver:
+    """DNSClient wrapper that answers from DNSCache when it can."""
+
+    def __init__(self, client, cache=None):
+        self.client = client
+        self.cache = cache if cache is not None else DNSCache()
+
+    async def query(self, name, qtype='A'):
+        msg = self.cache.get(name, qtype)
+        if msg is not None:
+            return msg
+        msg = await self.client.query(name, qtype)
+        self.cache.put_message(name, qtype, msg)
+        return msg
+
+    async def query_many(self, queries):
+        return await asyncio.gather(*(self.query(name, qtype) for name, qtype in queries),
+                                    return_exceptions=True)
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cached DNS lookups for a list of names")
+    parser.add_argument("names", help="file with one name per line")
+    parser.add_argument("--type", default="A")
+    parser.add_argument("--server", default="8.8.8.8")
+    parser.add_argument("--port", type=int, default=53)
+    parser.add_argument("--snapshot", help="cache snapshot file to load before and save after")
+    parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    args = parser.parse_args()
+
+    cache = DNSCache(args.max_entries)
+    if args.snapshot:
+        print(f"Loaded {cache.load(args.snapshot)} cached entries", file=sys.stderr)
+
+    with open(args.names) as f:
+        names = [line.strip() for line in f if line.strip()]
+
+    async def main():
+        async with DNSClient(args.server, args.port) as client:
+            resolver = CachingResolver(client, cache)
+            results = await resolver.query_many([(n, args.type) for n in names])
+        for name, msg in zip(names, results):
+            if isinstance(msg, Exception):
+                print(json.dumps({"query": name, "error": repr(msg)}))
+            else:
+                print(json.dumps({"query": name, **msg.to_dict()}))
+
+    asyncio.run(main())
+    if args.snapshot:
+        cache.save(args.snapshot)
+    print(json.dumps(cache.stats()), file=sys.stderr)
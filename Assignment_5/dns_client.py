@@ -0,0 +1,611 @@
+"""
+Raw DNS client (RFC 1035 wire format) over UDP with TCP fallback
+- Builds and parses DNS messages directly, including name compression
+- Record types: A, AAAA, PTR, MX, TXT, CNAME (others are returned as raw hex)
+- One UDP socket carries many queries at once; replies are matched back to
+  their query by transaction ID, so query_many pipelines the whole batch.
+  At most max_in_flight queries are outstanding at a time (the rest wait), so a
+  big batch neither overflows the socket's receive buffer nor runs out of IDs
+- Replies with the TC (truncated) bit set are retried over TCP
+- Transaction IDs come from `secrets`; a UDP reply is accepted only if its ID and
+  question match a pending query, anything else is ignored (spoofed or stale)
+- StubDNSServer answers from an in-memory zone on loopback (UDP + TCP), for
+  trying the client without touching real resolvers: python dns_client.py --stub
+- python dns_client.py --self-test runs checks against the stub (also under -O)
+  (every record type, TC -> TCP fallback, NXDOMAIN, IDNA names, decoy replies)
+
+Usage: python dns_client.py [--server IP] [--port N] [--type A] NAME [NAME ...]
+       python dns_client.py --stub | --self-test
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import secrets
+import struct
+import sys
+from collections import namedtuple
+
+DNS_PORT = 53
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_RETRIES = 2
+DEFAULT_MAX_IN_FLIGHT = 128  # a default receive buffer holds ~200 small datagrams
+MAX_TXIDS = 1 << 16
+UDP_MAX = 512
+
+TYPES = {'A': 1, 'NS': 2, 'CNAME': 5, 'SOA': 6, 'PTR': 12, 'MX': 15, 'TXT': 16, 'AAAA': 28}
+TYPE_NAMES = {v: k for k, v in TYPES.items()}
+CLASS_IN = 1
+
+RCODE_NOERROR = 0
+RCODE_SERVFAIL = 2
+RCODE_NXDOMAIN = 3
+RCODE_NAMES = {0: 'NOERROR', 1: 'FORMERR', 2: 'SERVFAIL', 3: 'NXDOMAIN', 4: 'NOTIMP', 5: 'REFUSED'}
+
+FLAG_QR = 0x8000
+FLAG_AA = 0x0400
+FLAG_TC = 0x0200
+FLAG_RD = 0x0100
+FLAG_RA = 0x0080
+
+HEADER = struct.Struct('>HHHHHH')
+
+Question = namedtuple('Question', 'name type')
+Record = namedtuple('Record', 'name type ttl data')
+
+
+class DNSMessage:
+    """Parsed DNS message; record types are names ('A', 'MX', ...) where known."""
+
+    def __init__(self, txid, flags, questions, answers, authority, additional):
+        self.id = txid
+        self.flags = flags
+        self.questions = questions
+        self.answers = answers
+        self.authority = authority
+        self.additional = additional
+
+    @property
+    def rcode(self):
+        return self.flags & 0xF
+
+    @property
+    def truncated(self):
+        return bool(self.flags & FLAG_TC)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "rcode": RCODE_NAMES.get(self.rcode, self.rcode),
+            "questions": [q._asdict() for q in self.questions],
+            "answers": [r._asdict() for r in self.answers],
+            "authority": [r._asdict() for r in self.authority],
+        }
+
+
+#  ENCODING
+
+def type_code(qtype):
+    return TYPES[qtype.upper()] if isinstance(qtype, str) else qtype
+
+
+def canonical_name(name):
+    """Lower-case ASCII (IDNA) form without the trailing dot, as names come back on the wire."""
+    labels = name.rstrip('.').split('.') if name.strip('.') else []
+    return '.'.join(label.encode('idna').decode('ascii') for label in labels).lower()
+
+
+def encode_name(name):
+    out = bytearray()
+    for label in name.rstrip('.').split('.') if name.strip('.') else []:
+        raw = label.encode('idna')
+        if not 0 < len(raw) <= 63:
+            raise ValueError(f"Invalid DNS label in {name!r}")
+        out.append(len(raw))
+        out += raw
+    if len(out) + 1 > 255:
+        raise ValueError(f"DNS name too long: {name!r}")
+    return bytes(out) + b'\x00'
+
+
+def encode_rdata(rtype, data):
+    if rtype == TYPES['A']:
+        return ipaddress.IPv4Address(data).packed
+    if rtype == TYPES['AAAA']:
+        return ipaddress.IPv6Address(data).packed
+    if rtype in (TYPES['CNAME'], TYPES['PTR'], TYPES['NS']):
+        return encode_name(data)
+    if rtype == TYPES['MX']:
+        preference, exchange = data
+        return struct.pack('>H', preference) + encode_name(exchange)
+    if rtype == TYPES['TXT']:
+        out = bytearray()
+        for s in ([data] if isinstance(data, str) else data):
+            raw = s.encode()
+            for i in range(0, max(len(raw), 1), 255):
+                piece = raw[i:i + 255]
+                out.append(len(piece))
+                out += piece
+        return bytes(out)
+    if rtype == TYPES['SOA']:
+        mname, rname, serial, refresh, retry, expire, minimum = data
+        return encode_name(mname) + encode_name(rname) + struct.pack(
+            '>IIIII', serial, refresh, retry, expire, minimum)
+    return bytes.fromhex(data)
+
+
+def encode_record(record):
+    rtype = type_code(record.type)
+    rdata = encode_rdata(rtype, record.data)
+    return encode_name(record.name) + struct.pack('>HHIH', rtype, CLASS_IN, record.ttl, len(rdata)) + rdata
+
+
+def build_message(txid, flags, questions=(), answers=(), authority=(), additional=()):
+    out = [HEADER.pack(txid, flags, len(questions), len(answers), len(authority), len(additional))]
+    for q in questions:
+        out.append(encode_name(q.name) + struct.pack('>HH', type_code(q.type), CLASS_IN))
+    for record in list(answers) + list(authority) + list(additional):
+        out.append(encode_record(record))
+    return b''.join(out)
+
+
+def build_query(txid, name, qtype='A', recursion=True):
+    return build_message(txid, FLAG_RD if recursion else 0, [Question(name, qtype)])
+
+
+def reverse_name(ip):
+    """PTR query name for an IPv4/IPv6 address."""
+    return ipaddress.ip_address(ip).reverse_pointer
+
+
+#  DECODING
+
+def decode_name(data, offset):
+    """Decode a (possibly compressed) name. Returns (name, offset after the name)."""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated DNS name")
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(data):
+                raise ValueError("Truncated DNS name pointer")
+            if end is None:
+                end = offset + 2
+            jumps += 1
+            if jumps > 64:
+                raise ValueError("DNS name compression loop")
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+        elif length == 0:
+            offset += 1
+            break
+        else:
+            labels.append(data[offset + 1:offset + 1 + length].decode('ascii', 'replace'))
+            offset += 1 + length
+    return '.'.join(labels), end if end is not None else offset
+
+
+def decode_rdata(data, offset, rtype, rdlength):
+    rdata = data[offset:offset + rdlength]
+    if len(rdata) != rdlength:
+        raise ValueError("Truncated record data")
+    if rtype == TYPES['A'] and rdlength == 4:
+        return str(ipaddress.IPv4Address(rdata))
+    if rtype == TYPES['AAAA'] and rdlength == 16:
+        return str(ipaddress.IPv6Address(rdata))
+    if rtype in (TYPES['CNAME'], TYPES['PTR'], TYPES['NS']):
+        return decode_name(data, offset)[0]
+    if rtype == TYPES['MX']:
+        return struct.unpack('>H', rdata[:2])[0], decode_name(data, offset + 2)[0]
+    if rtype == TYPES['TXT']:
+        strings = []
+        i = 0
+        while i < rdlength:
+            n = rdata[i]
+            strings.append(rdata[i + 1:i + 1 + n].decode('utf-8', 'replace'))
+            i += 1 + n
+        return strings
+    if rtype == TYPES['SOA']:
+        mname, pos = decode_name(data, offset)
+        rname, pos = decode_name(data, pos)
+        return (mname, rname) + struct.unpack('>IIIII', data[pos:pos + 20])
+    return rdata.hex()
+
+
+def _decode_records(data, offset, count):
+    records = []
+    for _ in range(count):
+        name, offset = decode_name(data, offset)
+        rtype, _, ttl, rdlength = struct.unpack('>HHIH', data[offset:offset + 10])
+        offset += 10
+        value = decode_rdata(data, offset, rtype, rdlength)
+        records.append(Record(name, TYPE_NAMES.get(rtype, rtype), ttl, value))
+        offset += rdlength
+    return records, offset
+
+
+def parse_message(data):
+    if len(data) < HEADER.size:
+        raise ValueError("DNS message shorter than header")
+    txid, flags, qdcount, ancount, nscount, arcount = HEADER.unpack_from(data)
+    offset = HEADER.size
+    questions = []
+    for _ in range(qdcount):
+        name, offset = decode_name(data, offset)
+        qtype, _ = struct.unpack('>HH', data[offset:offset + 4])
+        offset += 4
+        questions.append(Question(name, TYPE_NAMES.get(qtype, qtype)))
+    if flags & FLAG_TC:
+        # Record sections of a truncated reply are unreliable; only the header matters
+        return DNSMessage(txid, flags, questions, [], [], [])
+    answers, offset = _decode_records(data, offset, ancount)
+    authority, offset = _decode_records(data, offset, nscount)
+    additional, offset = _decode_records(data, offset, arcount)
+    return DNSMessage(txid, flags, questions, answers, authority, additional)
+
+
+#  CLIENT
+
+def _matches(msg, expected):
+    return [Question(q.name.lower(), q.type) for q in msg.questions] == [expected]
+
+
+class _ClientProtocol(asyncio.DatagramProtocol):
+    """pending maps txid -> (expected Question, future)."""
+
+    def __init__(self, pending):
+        self.pending = pending
+
+    def datagram_received(self, data, addr):
+        if len(data) < 2:
+            return
+        entry = self.pending.get(struct.unpack('>H', data[:2])[0])
+        if entry is None or entry[1].done():
+            return
+        try:
+            msg = parse_message(data)
+        except (ValueError, struct.error):
+            return
+        if _matches(msg, entry[0]):  # wrong question: not our reply, keep waiting
+            entry[1].set_result(msg)
+
+    def error_received(self, exc):
+        for _, fut in self.pending.values():
+            if not fut.done():
+                fut.set_exception(exc)
+
+
+class DNSClient:
+    """Asyncio DNS client; use as `async with DNSClient(server) as client:`."""
+
+    def __init__(self, server='8.8.8.8', port=DNS_PORT, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        if not 0 < max_in_flight <= MAX_TXIDS:
+            raise ValueError(f"max_in_flight must be between 1 and {MAX_TXIDS}")
+        self.server = server
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.transport = None
+        self._pending = {}
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ClientProtocol(self._pending), remote_addr=(self.server, self.port))
+        return self
+
+    async def close(self):
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _new_id(self):
+        if len(self._pending) >= MAX_TXIDS:
+            raise RuntimeError("all 65536 DNS transaction IDs are in use")
+        while True:
+            txid = secrets.randbits(16)
+            if txid not in self._pending:
+                return txid
+
+    async def _query_tcp(self, packet, txid, expected):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.server, self.port), self.timeout)
+        try:
+            writer.write(struct.pack('>H', len(packet)) + packet)
+            await writer.drain()
+            length = struct.unpack('>H', await asyncio.wait_for(reader.readexactly(2), self.timeout))[0]
+            msg = parse_message(await asyncio.wait_for(reader.readexactly(length), self.timeout))
+        finally:
+            writer.close()
+        if msg.id != txid or not _matches(msg, expected):
+            raise ValueError("DNS reply over TCP does not match the query")
+        return msg
+
+    async def query(self, name, qtype='A'):
+        """Send one query and return the parsed DNSMessage (raises asyncio.TimeoutError).
+        Waits for a slot first if max_in_flight queries are already outstanding."""
+        if self.transport is None:
+            await self.connect()
+        async with self._in_flight:
+            return await self._query(name, qtype)
+
+    async def _query(self, name, qtype):
+        loop = asyncio.get_running_loop()
+        txid = self._new_id()
+        packet = build_query(txid, name, qtype)
+        expected = Question(canonical_name(name), TYPE_NAMES.get(type_code(qtype), qtype))
+
+        for attempt in range(self.retries + 1):
+            fut = loop.create_future()
+            self._pending[txid] = (expected, fut)
+            self.transport.sendto(packet)
+            try:
+                msg = await asyncio.wait_for(fut, self.timeout)
+            except asyncio.TimeoutError:
+                if attempt == self.retries:
+                    raise
+                continue
+            finally:
+                self._pending.pop(txid, None)
+
+            if msg.truncated:
+                msg = await self._query_tcp(packet, txid, expected)
+            return msg
+
+    async def query_many(self, queries):
+        """Pipeline many (name, qtype) queries on the one socket. Returns results in order;
+        a failed query yields its exception instead of a DNSMessage."""
+        return await asyncio.gather(*(self.query(name, qtype) for name, qtype in queries),
+                                    return_exceptions=True)
+
+
+def resolve(name, qtype='A', server='8.8.8.8', port=DNS_PORT, timeout=DEFAULT_TIMEOUT):
+    """Blocking single lookup."""
+    async def run():
+        async with DNSClient(server, port, timeout) as client:
+            return await client.query(name, qtype)
+    return asyncio.run(run())
+
+
+#  STUB SERVER
+
+class _StubUDP(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        reply = self.server.answer(data)
+        if reply is None:
+            return
+        if len(reply) > UDP_MAX:
+            txid, flags = HEADER.unpack_from(reply)[:2]
+            msg = parse_message(data)
+            reply = build_message(txid, flags | FLAG_TC, msg.questions)
+        self.transport.sendto(reply, addr)
+
+
+class StubDNSServer:
+    """Authoritative-only DNS server for loopback use.
+    zone maps (name, type) -> list of (ttl, data); names without entries get NXDOMAIN."""
+
+    def __init__(self, zone, host='127.0.0.1', port=0, negative_ttl=60):
+        self.zone = {(canonical_name(name), t.upper()): v for (name, t), v in zone.items()}
+        self.names = {name for name, _ in self.zone}
+        self.host = host
+        self.port = port
+        self.negative_ttl = negative_ttl
+        self.queries = 0
+        self.tcp_queries = 0
+        self._udp = None
+        self._tcp = None
+
+    def answer(self, data):
+        try:
+            query = parse_message(data)
+        except (ValueError, struct.error):
+            return None
+        self.queries += 1
+        flags = FLAG_QR | FLAG_AA | (query.flags & FLAG_RD)
+        if len(query.questions) != 1:
+            return build_message(query.id, flags | 1, query.questions)
+
+        q = query.questions[0]
+        name = q.name.lower()
+        answers = []
+        if (name, q.type) in self.zone:
+            answers = [Record(q.name, q.type, ttl, data) for ttl, data in self.zone[(name, q.type)]]
+        elif (name, 'CNAME') in self.zone:
+            answers = [Record(q.name, 'CNAME', ttl, data) for ttl, data in self.zone[(name, 'CNAME')]]
+        if name not in self.names:
+            soa = Record(name, 'SOA', self.negative_ttl,
+                         ('ns.stub', 'admin.stub', 1, 3600, 600, 86400, self.negative_ttl))
+            return build_message(query.id, flags | RCODE_NXDOMAIN, query.questions, authority=[soa])
+        return build_message(query.id, flags, query.questions, answers)
+
+    async def _handle_tcp(self, reader, writer):
+        try:
+            while True:
+                length = struct.unpack('>H', await reader.readexactly(2))[0]
+                self.tcp_queries += 1
+                reply = self.answer(await reader.readexactly(length))
+                if reply is None:
+                    break
+                writer.write(struct.pack('>H', len(reply)) + reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._udp, _ = await loop.create_datagram_endpoint(
+            lambda: _StubUDP(self), local_addr=(self.host, self.port))
+        self.port = self._udp.get_extra_info('sockname')[1]
+        self._tcp = await asyncio.start_server(self._handle_tcp, self.host, self.port)
+        return self
+
+    async def stop(self):
+        if self._udp:
+            self._udp.close()
+        if self._tcp:
+            self._tcp.close()
+            await self._tcp.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+DEMO_ZONE = {
+    ('example.test', 'A'): [(300, '192.0.2.10'), (300, '192.0.2.11')],
+    ('example.test', 'AAAA'): [(300, '2001:db8::10')],
+    ('example.test', 'MX'): [(300, (10, 'mail.example.test'))],
+    ('example.test', 'TXT'): [(300, ['v=spf1 -all'])],
+    ('www.example.test', 'CNAME'): [(120, 'example.test')],
+    ('mail.example.test', 'A'): [(300, '192.0.2.25')],
+    ('10.2.0.192.in-addr.arpa', 'PTR'): [(300, 'example.test')],
+    ('bücher.example.test', 'A'): [(300, '192.0.2.30')],
+    # Too large for 512-byte UDP, forces the TCP fallback
+    ('big.example.test', 'TXT'): [(300, ['x' * 200]) for _ in range(5)],
+}
+
+
+async def _stub_demo():
+    async with StubDNSServer(DEMO_ZONE) as server:
+        async with DNSClient('127.0.0.1', server.port, timeout=1.0) as client:
+            queries = [('example.test', 'A'), ('example.test', 'AAAA'), ('example.test', 'MX'),
+                       ('example.test', 'TXT'), ('www.example.test', 'A'),
+                       (reverse_name('192.0.2.10'), 'PTR'), ('big.example.test', 'TXT'),
+                       ('missing.example.test', 'A')]
+            results = await client.query_many(queries)
+            for (name, qtype), msg in zip(queries, results):
+                print(json.dumps({"query": name, "type": qtype, **msg.to_dict()}))
+
+
+class _DecoyUDP(_StubUDP):
+    """Sends a reply for a different question with the same txid before the real one."""
+
+    def datagram_received(self, data, addr):
+        query = parse_message(data)
+        decoy = build_message(query.id, FLAG_QR, [Question('decoy.test', 'A')],
+                              [Record('decoy.test', 'A', 300, '203.0.113.66')])
+        self.transport.sendto(decoy, addr)
+        super().datagram_received(data, addr)
+
+
+class SelfTestFailure(Exception):
+    """A --self-test check failed."""
+
+
+def _check(ok, what):
+    # Not `assert`: the checks must still run under python -O
+    if not ok:
+        raise SelfTestFailure(what)
+
+
+async def self_test():
+    """Checks against StubDNSServer on loopback; raises SelfTestFailure on the first miss."""
+    async with StubDNSServer(DEMO_ZONE) as server:
+        async with DNSClient('127.0.0.1', server.port, timeout=1.0, retries=0) as client:
+            msg = await client.query('example.test', 'A')
+            _check(msg.rcode == RCODE_NOERROR, "A: rcode")
+            _check(sorted(r.data for r in msg.answers) == ['192.0.2.10', '192.0.2.11'], "A: addresses")
+            _check([r.ttl for r in msg.answers] == [300, 300], "A: TTLs")
+
+            msg = await client.query('example.test', 'AAAA')
+            _check([r.data for r in msg.answers] == ['2001:db8::10'], "AAAA answer")
+
+            msg = await client.query('example.test', 'MX')
+            _check([r.data for r in msg.answers] == [(10, 'mail.example.test')], "MX answer")
+
+            msg = await client.query('example.test', 'TXT')
+            _check([r.data for r in msg.answers] == [['v=spf1 -all']], "TXT answer")
+
+            msg = await client.query('www.example.test', 'A')
+            _check([(r.type, r.data) for r in msg.answers] == [('CNAME', 'example.test')], "CNAME answer")
+
+            msg = await client.query(reverse_name('192.0.2.10'), 'PTR')
+            _check([r.data for r in msg.answers] == ['example.test'], "PTR answer")
+
+            msg = await client.query('bücher.example.test', 'A')
+            _check([r.data for r in msg.answers] == ['192.0.2.30'], "IDNA name: answer")
+            _check(msg.questions[0].name == 'xn--bcher-kva.example.test', "IDNA name: question sent as punycode")
+
+            tcp_before = server.tcp_queries
+            msg = await client.query('big.example.test', 'TXT')
+            _check(server.tcp_queries == tcp_before + 1, "TC reply did not trigger TCP")
+            _check(not msg.truncated and len(msg.answers) == 5, "TCP fallback: full answer")
+            _check(all(r.data == ['x' * 200] for r in msg.answers), "TCP fallback: record data")
+
+            msg = await client.query('missing.example.test', 'A')
+            _check(msg.rcode == RCODE_NXDOMAIN and not msg.answers, "NXDOMAIN: rcode, no answers")
+            _check([r.type for r in msg.authority] == ['SOA'], "NXDOMAIN: SOA in authority")
+
+            results = await client.query_many([('example.test', 'A')] * 50)
+            _check(all(isinstance(m, DNSMessage) and m.answers for m in results), "query_many: every query answered")
+
+    # A mismatched reply with the right txid is skipped, not raised
+    decoy_server = StubDNSServer(DEMO_ZONE)
+    loop = asyncio.get_running_loop()
+    decoy_server._udp, _ = await loop.create_datagram_endpoint(
+        lambda: _DecoyUDP(decoy_server), local_addr=('127.0.0.1', 0))
+    try:
+        port = decoy_server._udp.get_extra_info('sockname')[1]
+        async with DNSClient('127.0.0.1', port, timeout=1.0, retries=0) as client:
+            msg = await client.query('example.test', 'A')
+            _check(sorted(r.data for r in msg.answers) == ['192.0.2.10', '192.0.2.11'], "decoy reply skipped")
+    finally:
+        await decoy_server.stop()
+    print("dns_client self-test passed")
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raw UDP DNS client")
+    parser.add_argument("names", nargs="*", help="names (or IPs for PTR) to look up")
+    parser.add_argument("--server", default="8.8.8.8")
+    parser.add_argument("--port", type=int, default=DNS_PORT)
+    parser.add_argument("--type", default="A", choices=("A", "AAAA", "PTR", "MX", "TXT", "CNAME"))
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--stub", action="store_true", help="run queries against a local stub server")
+    parser.add_argument("--self-test", action="store_true", help="run the checks against the stub")
+    args = parser.parse_args()
+
+    if args.self_test:
+        try:
+            asyncio.run(self_test())
+        except SelfTestFailure as e:
+            sys.exit(f"dns_client self-test FAILED: {e}")
+    elif args.stub:
+        asyncio.run(_stub_demo())
+    else:
+        names = [reverse_name(n) if args.type == 'PTR' else n for n in args.names]
+
+        async def main():
+            async with DNSClient(args.server, args.port, args.timeout) as client:
+                results = await client.query_many([(n, args.type) for n in names])
+            for name, msg in zip(names, results):
+                if isinstance(msg, Exception):
+                    print(json.dumps({"query": name, "error": repr(msg)}))
+                else:
+                    print(json.dumps({"query": name, **msg.to_dict()}))
+
+        asyncio.run(main())
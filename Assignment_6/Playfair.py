@@ -1,5 +1,9 @@
 # Playfair Cipher Implementation with User Input
 
+from functools import lru_cache
+
+ALPHABET = "ABCDEFGHIKLMNOPQRSTUVWXYZ"  # J excluded
+
 def generate_key_matrix(key):
     key = key.upper().replace("J", "I")  # Treat I and J as same
     matrix = []
@@ -10,7 +14,7 @@ def generate_key_matrix(key):
             matrix.append(char)
             used.add(char)
 
-    for char in "ABCDEFGHIKLMNOPQRSTUVWXYZ":  # J excluded
+    for char in ALPHABET:
         if char not in used:
             matrix.append(char)
 
@@ -25,31 +29,32 @@ def find_position(matrix, letter):
     return None
 
 
-def prepare_text(text):
-    text = text.upper().replace("J", "I")
-    text = "".join([c for c in text if c.isalpha()])
+def clean_text(text):
+    return "".join([c for c in text.upper().replace("J", "I") if c.isalpha()])
 
-    prepared = ""
-    i = 0
-    while i < len(text):
-        a = text[i]
-        b = ''
-        if i + 1 < len(text):
-            b = text[i + 1]
-        else:
-            b = 'X'
 
+def pair_letters(text):
+    """Split cleaned text into digraphs, inserting 'X' between doubled letters.
+    Returns (pairs, leftover) where leftover is '' or a single unpaired letter."""
+    pairs = []
+    i = 0
+    n = len(text)
+    while i + 1 < n:
+        a, b = text[i], text[i + 1]
         if a == b:
-            prepared += a + 'X'
+            pairs.append(a + 'X')
             i += 1
         else:
-            prepared += a + b
+            pairs.append(a + b)
             i += 2
+    return pairs, text[i:]
 
-    if len(prepared) % 2 != 0:
-        prepared += 'X'
 
-    return prepared
+def prepare_text(text):
+    pairs, leftover = pair_letters(clean_text(text))
+    if leftover:
+        pairs.append(leftover + 'X')
+    return "".join(pairs)
 
 
 def encrypt_pair(a, b, matrix):
@@ -76,36 +81,104 @@ def decrypt_pair(a, b, matrix):
         return matrix[row1][col2] + matrix[row2][col1]
 
 
+class PlayfairKey:
+    """Compiled key: letter -> (row, col) index plus full digraph lookup tables."""
+
+    def __init__(self, key):
+        self.key = key
+        self.matrix = generate_key_matrix(key)
+        self.positions = {self.matrix[i][j]: (i, j) for i in range(5) for j in range(5)}
+        self.encrypt_table = {}
+        self.decrypt_table = {}
+        for a in ALPHABET:
+            for b in ALPHABET:
+                self.encrypt_table[a + b] = encrypt_pair(a, b, self.matrix)
+                self.decrypt_table[a + b] = decrypt_pair(a, b, self.matrix)
+
+    def encrypt(self, text):
+        text = prepare_text(text)
+        table = self.encrypt_table
+        return "".join([table[text[i:i + 2]] for i in range(0, len(text), 2)])
+
+    def decrypt(self, cipher):
+        table = self.decrypt_table
+        return "".join([table[cipher[i:i + 2]] for i in range(0, len(cipher), 2)])
+
+
+@lru_cache(maxsize=128)
+def compile_key(key):
+    """Return a cached PlayfairKey so repeated calls with the same key skip setup."""
+    return PlayfairKey(key)
+
+
 def encrypt(text, key):
-    matrix = generate_key_matrix(key)
-    text = prepare_text(text)
-    cipher = ""
-    for i in range(0, len(text), 2):
-        cipher += encrypt_pair(text[i], text[i + 1], matrix)
-    return cipher
+    return compile_key(key).encrypt(text)
 
 
 def decrypt(cipher, key):
-    matrix = generate_key_matrix(key)
-    text = ""
-    for i in range(0, len(cipher), 2):
-        text += decrypt_pair(cipher[i], cipher[i + 1], matrix)
-    return text
+    return compile_key(key).decrypt(cipher)
+
+
+# ----------- STREAMING -----------
+
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+def iter_chunks(source, size=STREAM_CHUNK_SIZE):
+    """Yield text chunks from a file-like object (read in fixed-size pieces) or any iterable of str."""
+    if hasattr(source, "read"):
+        while True:
+            chunk = source.read(size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        yield from source
+
+
+def encrypt_stream(source, key):
+    """Encrypt a file or iterable of text, yielding ciphertext chunks.
+    A letter left unpaired at the end of a chunk is carried into the next one,
+    so the output equals encrypt() on the concatenated input."""
+    table = compile_key(key).encrypt_table
+    carry = ""
+    for chunk in iter_chunks(source):
+        pairs, carry = pair_letters(carry + clean_text(chunk))
+        if pairs:
+            yield "".join([table[p] for p in pairs])
+    if carry:
+        yield table[carry + 'X']
+
+
+def decrypt_stream(source, key):
+    """Decrypt a file or iterable of ciphertext, yielding plaintext chunks.
+    Non-letters (e.g. newlines) are skipped."""
+    table = compile_key(key).decrypt_table
+    carry = ""
+    for chunk in iter_chunks(source):
+        text = carry + "".join([c for c in chunk.upper() if c.isalpha()])
+        end = len(text) - len(text) % 2
+        carry = text[end:]
+        if end:
+            yield "".join([table[text[i:i + 2]] for i in range(0, end, 2)])
+    if carry:
+        raise ValueError("Ciphertext has an odd number of letters")
 
 
 # ----------- MAIN PROGRAM -----------
 
-key = input("Enter the key: ")
-plaintext = input("Enter the plaintext: ")
+if __name__ == "__main__":
+    key = input("Enter the key: ")
+    plaintext = input("Enter the plaintext: ")
 
-ciphertext = encrypt(plaintext, key)
-decrypted_text = decrypt(ciphertext, key)
+    ciphertext = encrypt(plaintext, key)
+    decrypted_text = decrypt(ciphertext, key)
 
-print("\n--- PLAYFAIR CIPHER ---")
-print("Key Matrix:")
-for row in generate_key_matrix(key):
-    print(row)
+    print("\n--- PLAYFAIR CIPHER ---")
+    print("Key Matrix:")
+    for row in compile_key(key).matrix:
+        print(row)
 
-print("\nPlaintext:", plaintext.upper())
-print("Ciphertext:", ciphertext)
-print("Decrypted Text:", decrypted_text)
+    print("\nPlaintext:", plaintext.upper())
+    print("Ciphertext:", ciphertext)
+    print("Decrypted Text:", decrypted_text)
@@ -0,0 +1,236 @@
+"""
+Playfair key recovery by simulated annealing
+- Candidate keys are permutations of the 25-letter alphabet, turned into matrices
+  with generate_key_matrix from Playfair.py
+- Fitness is the sum of quadgram log10-probabilities of the trial decryption,
+  computed with NumPy on integer-encoded text (one gather per quadgram)
+- Independent random restarts run in a process pool; the best key wins
+- Reports evaluated keys per second
+
+Quadgram statistics come from a "QUAD COUNT" per-line file (e.g. english_quadgrams.txt)
+or are counted from any large English corpus with --corpus.
+
+Usage: python playfair_crack.py CIPHERTEXT_FILE (--quadgrams FILE | --corpus FILE)
+                                [--restarts N] [--workers N] [--seed N]
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Playfair import ALPHABET, clean_text, decrypt, generate_key_matrix
+
+START_TEMP = 10.0
+TEMP_STEP = 0.2
+ITERATIONS_PER_TEMP = 10000
+
+KEY_CODES = np.array([ord(c) - 65 for c in ALPHABET], dtype=np.int64)
+
+
+#  QUADGRAM SCORING
+
+def quadgram_index(codes):
+    return codes[:-3] * 17576 + codes[1:-2] * 676 + codes[2:-1] * 26 + codes[3:]
+
+
+class QuadgramScorer:
+    """Log10-probability table indexed by the 4-letter code a*26^3 + b*26^2 + c*26 + d."""
+
+    def __init__(self, counts):
+        total = counts.sum()
+        if not total:
+            raise ValueError("Quadgram table is empty")
+        floor = math.log10(0.01 / total)
+        with np.errstate(divide='ignore'):
+            table = np.log10(counts / total)
+        table[counts == 0] = floor
+        self.table = table
+
+    @classmethod
+    def from_file(cls, path):
+        counts = np.zeros(26 ** 4, dtype=np.float64)
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 2 or len(parts[0]) != 4 or not parts[0].isalpha():
+                    continue
+                codes = np.array([ord(c) - 65 for c in parts[0].upper()])
+                counts[quadgram_index(codes)[0]] += int(parts[1])
+        return cls(counts)
+
+    @classmethod
+    def from_corpus(cls, path):
+        with open(path, errors='ignore') as f:
+            text = "".join([c for c in f.read().upper() if 'A' <= c <= 'Z'])
+        codes = np.frombuffer(text.encode(), dtype=np.uint8).astype(np.int64) - 65
+        counts = np.bincount(quadgram_index(codes), minlength=26 ** 4).astype(np.float64)
+        return cls(counts)
+
+    def score(self, codes):
+        return float(self.table[quadgram_index(codes)].sum())
+
+
+#  VECTORIZED DECRYPTION
+
+def encode_ciphertext(text):
+    text = clean_text(text)
+    if len(text) % 2:
+        raise ValueError("Ciphertext must have an even number of letters")
+    codes = np.frombuffer(text.encode(), dtype=np.uint8).astype(np.int64) - 65
+    return codes[0::2], codes[1::2]
+
+
+def decrypt_codes(key, c1, c2):
+    """Decrypt digraph code arrays with key (25 letter codes, row-major). Returns interleaved codes."""
+    key = np.asarray(key)
+    pos = np.zeros(26, dtype=np.int64)
+    pos[key] = np.arange(25)
+    r1, k1 = np.divmod(pos[c1], 5)
+    r2, k2 = np.divmod(pos[c2], 5)
+
+    same_row = r1 == r2
+    same_col = (k1 == k2) & ~same_row
+    # Rectangle rule by default, then overwrite the row / column cases
+    p1 = key[r1 * 5 + k2]
+    p2 = key[r2 * 5 + k1]
+    p1 = np.where(same_row, key[r1 * 5 + (k1 - 1) % 5], p1)
+    p2 = np.where(same_row, key[r2 * 5 + (k2 - 1) % 5], p2)
+    p1 = np.where(same_col, key[((r1 - 1) % 5) * 5 + k1], p1)
+    p2 = np.where(same_col, key[((r2 - 1) % 5) * 5 + k2], p2)
+
+    out = np.empty(p1.size * 2, dtype=np.int64)
+    out[0::2] = p1
+    out[1::2] = p2
+    return out
+
+
+#  SIMULATED ANNEALING
+
+def modify_key(key, rng):
+    key = key[:]
+    op = rng.randrange(50)
+    if op == 0:  # swap two rows
+        a, b = rng.sample(range(5), 2)
+        key[a * 5:a * 5 + 5], key[b * 5:b * 5 + 5] = key[b * 5:b * 5 + 5], key[a * 5:a * 5 + 5]
+    elif op == 1:  # swap two columns
+        a, b = rng.sample(range(5), 2)
+        for r in range(5):
+            key[r * 5 + a], key[r * 5 + b] = key[r * 5 + b], key[r * 5 + a]
+    elif op == 2:  # reverse the whole key
+        key.reverse()
+    elif op == 3:  # flip rows top-to-bottom
+        key = [x for r in range(4, -1, -1) for x in key[r * 5:r * 5 + 5]]
+    elif op == 4:  # flip columns left-to-right
+        key = [x for r in range(5) for x in reversed(key[r * 5:r * 5 + 5])]
+    else:  # swap two letters
+        a, b = rng.sample(range(25), 2)
+        key[a], key[b] = key[b], key[a]
+    return key
+
+
+def key_to_string(key):
+    return "".join([chr(c + 65) for c in key])
+
+
+def anneal(c1, c2, scorer, seed, start_temp=START_TEMP, step=TEMP_STEP,
+           iterations=ITERATIONS_PER_TEMP):
+    """One annealing run from a random key. Returns (best_score, best_key, evaluations)."""
+    rng = random.Random(seed)
+    parent = [int(c) for c in KEY_CODES]
+    rng.shuffle(parent)
+    parent_score = scorer.score(decrypt_codes(parent, c1, c2))
+    best, best_score = parent, parent_score
+    evaluations = 1
+
+    temp = start_temp
+    while temp >= 0:
+        for _ in range(iterations):
+            child = modify_key(parent, rng)
+            child_score = scorer.score(decrypt_codes(child, c1, c2))
+            evaluations += 1
+            delta = child_score - parent_score
+            if delta >= 0 or (temp > 0 and rng.random() < math.exp(delta / temp)):
+                parent, parent_score = child, child_score
+                if parent_score > best_score:
+                    best, best_score = parent, parent_score
+        temp -= step
+    return best_score, key_to_string(best), evaluations
+
+
+# Per-worker state set by _init_worker
+_scorer = None
+_cipher_codes = None
+
+
+def _init_worker(table, c1, c2):
+    global _scorer, _cipher_codes
+    _scorer = QuadgramScorer.__new__(QuadgramScorer)
+    _scorer.table = table
+    _cipher_codes = (c1, c2)
+
+
+def _restart(seed, start_temp, step, iterations):
+    return anneal(*_cipher_codes, _scorer, seed, start_temp, step, iterations)
+
+
+def crack(ciphertext, scorer, restarts=4, workers=None, seed=None,
+          start_temp=START_TEMP, step=TEMP_STEP, iterations=ITERATIONS_PER_TEMP):
+    """Run independent annealing restarts across a process pool and return a result dict."""
+    c1, c2 = encode_ciphertext(ciphertext)
+    base = random.randrange(1 << 30) if seed is None else seed
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(scorer.table, c1, c2)) as pool:
+        runs = list(pool.map(_restart, [base + i for i in range(restarts)],
+                             [start_temp] * restarts, [step] * restarts, [iterations] * restarts))
+    elapsed = time.perf_counter() - start
+
+    best_score, best_key, _ = max(runs)
+    evaluations = sum(r[2] for r in runs)
+    return {
+        "key": best_key,
+        "matrix": ["".join(row) for row in generate_key_matrix(best_key)],
+        "score": best_score,
+        "plaintext": decrypt(clean_text(ciphertext), best_key),
+        "restarts": restarts,
+        "evaluations": evaluations,
+        "seconds": round(elapsed, 3),
+        "keys_per_sec": round(evaluations / elapsed, 1),
+    }
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Playfair key recovery by simulated annealing")
+    parser.add_argument("ciphertext", help="file containing the ciphertext")
+    stats = parser.add_mutually_exclusive_group(required=True)
+    stats.add_argument("--quadgrams", help="quadgram count file (QUAD COUNT per line)")
+    stats.add_argument("--corpus", help="plain English text to count quadgrams from")
+    parser.add_argument("--restarts", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--temp", type=float, default=START_TEMP)
+    parser.add_argument("--step", type=float, default=TEMP_STEP)
+    parser.add_argument("--iterations", type=int, default=ITERATIONS_PER_TEMP)
+    args = parser.parse_args()
+
+    if args.quadgrams:
+        scorer = QuadgramScorer.from_file(args.quadgrams)
+    else:
+        scorer = QuadgramScorer.from_corpus(args.corpus)
+
+    with open(args.ciphertext) as f:
+        ciphertext = f.read()
+
+    result = crack(ciphertext, scorer, args.restarts, args.workers, args.seed,
+                   args.temp, args.step, args.iterations)
+    print(json.dumps(result, indent=2))
+    sys.exit(0)
@@ -192,6 +192,80 @@ def des_encrypt_block(block64, subkeys, encrypt=True):
     preoutput = r + l
     return final_permutation(preoutput)
 
+# INTEGER ENGINE 
+# Same cipher on 64-bit ints: permutations are byte-indexed lookup tables and
+# each S-box is merged with P into a 64-entry SP table, so a round is 8 lookups.
+
+def _build_perm_table(table, in_width):
+    out_width = len(table)
+    chunks = []
+    for c in range(in_width // 8):
+        entries = []
+        for v in range(256):
+            out = 0
+            for pos, src in enumerate(table):
+                src -= 1
+                if src // 8 == c and (v >> (7 - src % 8)) & 1:
+                    out |= 1 << (out_width - 1 - pos)
+            entries.append(out)
+        chunks.append(entries)
+    return chunks
+
+def _apply_perm(x, chunks, in_width):
+    out = 0
+    shift = in_width
+    for entries in chunks:
+        shift -= 8
+        out |= entries[(x >> shift) & 0xFF]
+    return out
+
+IP_TABLE = _build_perm_table(IP, 64)
+IP_INV_TABLE = _build_perm_table(IP_INV, 64)
+PC_1_TABLE = _build_perm_table(PC_1, 64)
+PC_2_TABLE = _build_perm_table(PC_2, 56)
+P_TABLE = _build_perm_table(P, 32)
+
+# SP[i][b]: S-box i applied to 6-bit input b, placed in its nibble and run through P
+SP = [
+    [_apply_perm(S_BOXES[i][((b >> 4) & 2) | (b & 1)][(b >> 1) & 0xF] << (28 - 4 * i), P_TABLE, 32)
+     for b in range(64)]
+    for i in range(8)
+]
+SP1, SP2, SP3, SP4, SP5, SP6, SP7, SP8 = SP
+
+def int_to_bin(x, width=64): return format(x, '0%db' % width)
+def bin_to_int(binstr): return int(binstr, 2)
+
+def left_shift_28(x, n): return ((x << n) | (x >> (28 - n))) & 0xFFFFFFF
+
+def generate_subkeys_int(key64):
+    key56 = _apply_perm(key64, PC_1_TABLE, 64)
+    c, d = key56 >> 28, key56 & 0xFFFFFFF
+    subkeys = []
+    for shift in SHIFT_SCHEDULE:
+        c = left_shift_28(c, shift)
+        d = left_shift_28(d, shift)
+        subkeys.append(_apply_perm((c << 28) | d, PC_2_TABLE, 56))
+    return subkeys
+
+def feistel_int(r, k):
+    # 34-bit window r32|r1..r32|r1: E's eight 6-bit groups sit 4 bits apart
+    x = ((r & 1) << 33) | (r << 1) | (r >> 31)
+    return (SP1[((x >> 28) ^ (k >> 42)) & 0x3F] | SP2[((x >> 24) ^ (k >> 36)) & 0x3F] |
+            SP3[((x >> 20) ^ (k >> 30)) & 0x3F] | SP4[((x >> 16) ^ (k >> 24)) & 0x3F] |
+            SP5[((x >> 12) ^ (k >> 18)) & 0x3F] | SP6[((x >> 8) ^ (k >> 12)) & 0x3F] |
+            SP7[((x >> 4) ^ (k >> 6)) & 0x3F] | SP8[(x ^ k) & 0x3F])
+
+def des_encrypt_block_int(block64, subkeys, encrypt=True):
+    ip = _apply_perm(block64, IP_TABLE, 64)
+    l, r = ip >> 32, ip & 0xFFFFFFFF
+    keys = subkeys if encrypt else subkeys[::-1]
+
+    for k in keys:
+        l, r = r, l ^ feistel_int(r, k)
+
+    return _apply_perm((r << 32) | l, IP_INV_TABLE, 64)
+
 # MAIN PROGRAM 
 
 if __name__ == "__main__":
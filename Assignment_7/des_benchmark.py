@@ -0,0 +1,209 @@
+"""
+DES known-answer tests and benchmarks
+- Known-answer vectors (NIST SP 800-17 / FIPS 81 examples) against des_encrypt_block,
+  generate_subkeys and the integer / batch engines
+- Microbenchmarks for permute, sbox_substitution and feistel
+- Throughput (blocks/s, MB/s) for 1 KB, 1 MB and 100 MB inputs per engine; the int
+  engine streams its input in STREAM_CHUNK pieces so memory stays flat at any size
+- Results are printed (or written) as JSON so runs can be compared across versions
+
+Usage: python des_benchmark.py [--sizes 1K,1M,100M] [--string-limit 64K]
+                               [--label NAME] [--output FILE] [--kat-only]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+import DES
+from des_modes import DESCipher
+
+try:
+    import numpy as np
+    import des_batch
+except ImportError:
+    np = None
+
+# (key, plaintext, ciphertext) in hex
+KAT_VECTORS = [
+    ("133457799BBCDFF1", "0123456789ABCDEF", "85E813540F0AB405"),
+    ("0E329232EA6D0D73", "8787878787878787", "0000000000000000"),
+    ("0101010101010101", "8000000000000000", "95F8A5E5DD31D900"),
+    ("0101010101010101", "4000000000000000", "DD7F121CA5015619"),
+    ("0101010101010101", "0000000000000001", "166B40B44ABA4BD6"),
+    ("8001010101010101", "0000000000000000", "95A8D72813DAA94D"),
+    ("4001010101010101", "0000000000000000", "0EEC1487DD8C26D5"),
+    ("0000000000000000", "0000000000000000", "8CA64DE9C1B123A7"),
+    ("FFFFFFFFFFFFFFFF", "FFFFFFFFFFFFFFFF", "7359B2163E4EDC58"),
+    ("3000000000000000", "1000000000000001", "958E6E627A05557B"),
+]
+
+# key -> (first subkey, last subkey) in hex
+SUBKEY_VECTORS = [
+    ("133457799BBCDFF1", "1B02EFFC7072", "CB3D8B0E17F5"),
+]
+
+SIZE_SUFFIXES = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+STREAM_CHUNK = 64 << 10
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(text[:-1]) * SIZE_SUFFIXES[text[-1]]
+    return int(text)
+
+
+def format_size(n):
+    for suffix in ('G', 'M', 'K'):
+        if n >= SIZE_SUFFIXES[suffix] and n % SIZE_SUFFIXES[suffix] == 0:
+            return f"{n // SIZE_SUFFIXES[suffix]}{suffix}"
+    return str(n)
+
+
+#  KNOWN-ANSWER TESTS
+
+def run_kat():
+    failures = []
+    for key_hex, pt_hex, ct_hex in KAT_VECTORS:
+        subkeys = DES.generate_subkeys(DES.hex_to_bin(key_hex))
+        ct_bin = DES.des_encrypt_block(DES.hex_to_bin(pt_hex), subkeys)
+        if DES.bin_to_hex(ct_bin) != ct_hex:
+            failures.append(f"des_encrypt_block key={key_hex} pt={pt_hex}")
+        if DES.bin_to_hex(DES.des_encrypt_block(ct_bin, subkeys, encrypt=False)) != pt_hex:
+            failures.append(f"des_encrypt_block decrypt key={key_hex} ct={ct_hex}")
+
+        subkeys_int = DES.generate_subkeys_int(int(key_hex, 16))
+        if DES.des_encrypt_block_int(int(pt_hex, 16), subkeys_int) != int(ct_hex, 16):
+            failures.append(f"des_encrypt_block_int key={key_hex} pt={pt_hex}")
+
+        if np is not None:
+            out = des_batch.des_encrypt_blocks(np.array([int(pt_hex, 16)], dtype=np.uint64), subkeys_int)
+            if int(out[0]) != int(ct_hex, 16):
+                failures.append(f"des_encrypt_blocks key={key_hex} pt={pt_hex}")
+
+    for key_hex, first_hex, last_hex in SUBKEY_VECTORS:
+        subkeys = DES.generate_subkeys(DES.hex_to_bin(key_hex))
+        if DES.bin_to_hex(subkeys[0]) != first_hex or DES.bin_to_hex(subkeys[-1]) != last_hex:
+            failures.append(f"generate_subkeys key={key_hex}")
+        if [int(k, 2) for k in subkeys] != DES.generate_subkeys_int(int(key_hex, 16)):
+            failures.append(f"generate_subkeys_int key={key_hex}")
+
+    return {
+        "vectors": len(KAT_VECTORS) + len(SUBKEY_VECTORS),
+        "passed": not failures,
+        "failures": failures,
+    }
+
+
+#  MICROBENCHMARKS
+
+def time_call(func, number):
+    """Best-of-3 time per call in nanoseconds."""
+    best = min(timeit.repeat(func, number=number, repeat=3))
+    return best / number * 1e9
+
+
+def run_micro(number=2000):
+    block = DES.hex_to_bin("0123456789ABCDEF")
+    r32 = block[32:]
+    subkeys = DES.generate_subkeys(DES.hex_to_bin("133457799BBCDFF1"))
+    bits48 = DES.xor_bits(DES.expansion(r32), subkeys[0])
+    subkeys_int = DES.generate_subkeys_int(0x133457799BBCDFF1)
+
+    return {
+        "permute_ip_ns": time_call(lambda: DES.permute(block, DES.IP), number),
+        "sbox_substitution_ns": time_call(lambda: DES.sbox_substitution(bits48), number),
+        "feistel_ns": time_call(lambda: DES.feistel(r32, subkeys[0]), number),
+        "feistel_int_ns": time_call(lambda: DES.feistel_int(0x01234567, subkeys_int[0]), number),
+        "des_encrypt_block_ns": time_call(lambda: DES.des_encrypt_block(block, subkeys), number // 10),
+        "des_encrypt_block_int_ns": time_call(lambda: DES.des_encrypt_block_int(0x0123456789ABCDEF, subkeys_int), number),
+    }
+
+
+#  THROUGHPUT
+
+def _string_engine(data, key):
+    subkeys = DES.generate_subkeys(DES.hex_to_bin(key.hex()))
+    for i in range(0, len(data), 8):
+        DES.des_encrypt_block(DES.hex_to_bin(data[i:i + 8].hex()), subkeys)
+
+
+class _Discard:
+    def write(self, data):
+        return len(data)
+
+
+def _int_engine(data, key):
+    DESCipher(key, 'ECB').encrypt_stream(io.BytesIO(data), _Discard(), STREAM_CHUNK)
+
+
+def _numpy_engine(data, key):
+    des_batch.ecb_encrypt(data, key)
+
+
+def run_throughput(sizes, string_limit):
+    engines = [("string", _string_engine), ("int", _int_engine)]
+    if np is not None:
+        engines.append(("numpy", _numpy_engine))
+
+    key = bytes.fromhex("133457799BBCDFF1")
+    results = []
+    for size in sizes:
+        data = os.urandom(size)
+        for name, func in engines:
+            entry = {"engine": name, "size": format_size(size), "bytes": size}
+            if name == "string" and size > string_limit:
+                entry["skipped"] = True
+                results.append(entry)
+                continue
+            start = time.perf_counter()
+            func(data, key)
+            elapsed = time.perf_counter() - start
+            entry.update({
+                "seconds": round(elapsed, 6),
+                "blocks_per_sec": round(size / 8 / elapsed, 1),
+                "mb_per_sec": round(size / (1 << 20) / elapsed, 4),
+            })
+            results.append(entry)
+            print(f"  {name:>6} {format_size(size):>5}: {entry['mb_per_sec']:.4f} MB/s", file=sys.stderr)
+    return results
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DES known-answer tests and benchmarks")
+    parser.add_argument("--sizes", default="1K,1M,100M", help="comma-separated input sizes")
+    parser.add_argument("--string-limit", default="64K", help="largest input for the string engine")
+    parser.add_argument("--label", default="", help="version label stored in the report")
+    parser.add_argument("--output", help="write JSON report to this file instead of stdout")
+    parser.add_argument("--kat-only", action="store_true", help="only run known-answer tests")
+    args = parser.parse_args()
+
+    report = {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__ if np is not None else None,
+        "kat": run_kat(),
+    }
+    if not args.kat_only:
+        report["micro"] = run_micro()
+        sizes = [parse_size(s) for s in args.sizes.split(",")]
+        report["throughput"] = run_throughput(sizes, parse_size(args.string_limit))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    sys.exit(0 if report["kat"]["passed"] else 1)
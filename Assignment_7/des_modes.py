@@ -0,0 +1,196 @@
+"""
+DES modes of operation (ECB / CBC / CTR) on top of the integer engine in DES.py
+- Key is expanded once per DESCipher and the subkeys are reused for every block
+- Blocks travel as 64-bit ints unpacked with struct, no hex/bin round-trips
+- ECB and CBC use PKCS#7 padding, CTR is a stream mode and needs none
+- Streams are processed in large chunks so file size does not affect memory use
+"""
+
+import os
+import struct
+import sys
+
+from DES import generate_subkeys_int, des_encrypt_block_int
+
+BLOCK_SIZE = 8
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB, must be a multiple of BLOCK_SIZE
+MODES = ('ECB', 'CBC', 'CTR')
+MASK64 = (1 << 64) - 1
+
+
+def pkcs7_pad(data, block_size=BLOCK_SIZE):
+    n = block_size - len(data) % block_size
+    return data + bytes([n]) * n
+
+
+def pkcs7_unpad(data, block_size=BLOCK_SIZE):
+    if not data or len(data) % block_size:
+        raise ValueError("Invalid PKCS#7 padding")
+    n = data[-1]
+    if n < 1 or n > block_size or data[-n:] != bytes([n]) * n:
+        raise ValueError("Invalid PKCS#7 padding")
+    return data[:-n]
+
+
+class DESCipher:
+    """DES in ECB, CBC or CTR mode with a cached key schedule."""
+
+    def __init__(self, key, mode='CBC', iv=None):
+        mode = mode.upper()
+        if mode not in MODES:
+            raise ValueError(f"Unsupported mode: {mode}")
+        self.key = bytes(key)
+        self.mode = mode
+        self._expand_key(self.key)
+
+        if mode == 'ECB':
+            self.iv = None
+        else:
+            if iv is None:
+                iv = os.urandom(BLOCK_SIZE)
+            if len(iv) != BLOCK_SIZE:
+                raise ValueError("IV / nonce must be 8 bytes")
+            self.iv = bytes(iv)
+
+    def _expand_key(self, key):
+        if len(key) != BLOCK_SIZE:
+            raise ValueError("DES key must be 8 bytes")
+        self.subkeys = generate_subkeys_int(int.from_bytes(key, 'big'))
+        self.inverse_subkeys = self.subkeys[::-1]
+
+    def _initial_chain(self):
+        return int.from_bytes(self.iv, 'big') if self.iv else 0
+
+    def _encrypt_block(self, block):
+        return des_encrypt_block_int(block, self.subkeys)
+
+    def _decrypt_block(self, block):
+        return des_encrypt_block_int(block, self.inverse_subkeys)
+
+    def _crypt(self, data, encrypt, chain):
+        """Process whole blocks of data (CTR also takes a trailing partial block).
+        chain is the previous ciphertext block for CBC or the counter for CTR.
+        Returns (output_bytes, new_chain)."""
+        n = len(data) // BLOCK_SIZE
+        blocks = struct.unpack('>%dQ' % n, data[:n * BLOCK_SIZE])
+        out = []
+
+        if self.mode == 'ECB':
+            process = self._encrypt_block if encrypt else self._decrypt_block
+            out = [process(b) for b in blocks]
+        elif self.mode == 'CBC':
+            if encrypt:
+                for b in blocks:
+                    chain = self._encrypt_block(b ^ chain)
+                    out.append(chain)
+            else:
+                for b in blocks:
+                    out.append(self._decrypt_block(b) ^ chain)
+                    chain = b
+        else:  # CTR: encryption and decryption are the same keystream XOR
+            for b in blocks:
+                out.append(b ^ self._encrypt_block(chain))
+                chain = (chain + 1) & MASK64
+
+        result = struct.pack('>%dQ' % n, *out)
+        tail = data[n * BLOCK_SIZE:]
+        if tail:
+            if self.mode != 'CTR':
+                raise ValueError("Data length must be a multiple of 8 bytes")
+            keystream = self._encrypt_block(chain).to_bytes(BLOCK_SIZE, 'big')
+            result += bytes(x ^ y for x, y in zip(tail, keystream))
+            chain = (chain + 1) & MASK64
+        return result, chain
+
+    #  BYTES API
+
+    def encrypt(self, data):
+        if self.mode != 'CTR':
+            data = pkcs7_pad(data)
+        return self._crypt(data, True, self._initial_chain())[0]
+
+    def decrypt(self, data):
+        if self.mode == 'CTR':
+            return self._crypt(data, False, self._initial_chain())[0]
+        if len(data) % BLOCK_SIZE:
+            raise ValueError("Ciphertext length must be a multiple of 8 bytes")
+        return pkcs7_unpad(self._crypt(data, False, self._initial_chain())[0])
+
+    #  STREAM API
+
+    def encrypt_stream(self, src, dst, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Encrypt file-like src into dst chunk by chunk. Returns bytes written."""
+        chain = self._initial_chain()
+        pending = b''
+        written = 0
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            data = pending + chunk if pending else chunk
+            cut = len(data) - len(data) % BLOCK_SIZE
+            out, chain = self._crypt(data[:cut], True, chain)
+            dst.write(out)
+            written += len(out)
+            pending = data[cut:]
+
+        if self.mode != 'CTR':
+            pending = pkcs7_pad(pending)
+        out, chain = self._crypt(pending, True, chain)
+        dst.write(out)
+        return written + len(out)
+
+    def decrypt_stream(self, src, dst, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Decrypt file-like src into dst chunk by chunk. Returns bytes written."""
+        chain = self._initial_chain()
+        pending = b''
+        written = 0
+        # ECB/CBC hold back the last full block until EOF so padding can be stripped
+        hold = 0 if self.mode == 'CTR' else BLOCK_SIZE
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            data = pending + chunk if pending else chunk
+            cut = len(data) - len(data) % BLOCK_SIZE
+            if cut == len(data):
+                cut -= hold
+            out, chain = self._crypt(data[:cut], False, chain)
+            dst.write(out)
+            written += len(out)
+            pending = data[cut:]
+
+        out, chain = self._crypt(pending, False, chain)
+        if self.mode != 'CTR':
+            out = pkcs7_unpad(out)
+        dst.write(out)
+        return written + len(out)
+
+    def encrypt_file(self, src_path, dst_path, chunk_size=DEFAULT_CHUNK_SIZE):
+        with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+            return self.encrypt_stream(src, dst, chunk_size)
+
+    def decrypt_file(self, src_path, dst_path, chunk_size=DEFAULT_CHUNK_SIZE):
+        with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+            return self.decrypt_stream(src, dst, chunk_size)
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    if len(sys.argv) != 7 or sys.argv[1] not in ('enc', 'dec'):
+        print("Usage: python des_modes.py enc|dec MODE KEY_HEX IV_HEX|- INPUT OUTPUT")
+        sys.exit(1)
+
+    action, mode, key_hex, iv_hex, src_path, dst_path = sys.argv[1:]
+    iv = None if iv_hex == '-' else bytes.fromhex(iv_hex)
+    cipher = DESCipher(bytes.fromhex(key_hex), mode, iv)
+
+    if action == 'enc':
+        n = cipher.encrypt_file(src_path, dst_path)
+    else:
+        n = cipher.decrypt_file(src_path, dst_path)
+
+    print(f"{mode.upper()} {action}: wrote {n} bytes to {dst_path}")
+    if cipher.iv:
+        print("IV (HEX):", cipher.iv.hex().upper())
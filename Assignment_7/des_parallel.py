@@ -0,0 +1,170 @@
+"""
+Multi-process DES for large files (ECB and CTR)
+- The input is split into 8-byte aligned segments, one task per segment
+- Subkeys are expanded once and handed to each worker through the pool initializer
+- Workers write straight into a memory-mapped, pre-sized destination file,
+  so ciphertext never travels back through the process pipes
+- CBC encryption is inherently serial and is not supported here (use DESCipher)
+- CTR without a nonce: like DESCipher, parallel_encrypt picks a random one and
+  returns it with the output path; parallel_decrypt needs it back
+"""
+
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from DES import generate_subkeys_int, des_encrypt_block_int
+from des_modes import BLOCK_SIZE, DEFAULT_CHUNK_SIZE, MASK64, pkcs7_pad, pkcs7_unpad
+
+PARALLEL_MODES = ('ECB', 'CTR')
+MIN_SEGMENT_SIZE = 1 << 20
+
+# Per-worker state set by _init_worker
+_subkeys = None
+_mode = None
+
+
+def _init_worker(subkeys, mode):
+    global _subkeys, _mode
+    _subkeys = subkeys
+    _mode = mode
+
+
+def _crypt_chunk(data, counter):
+    """ECB or CTR over one chunk; counter is the CTR block counter for data[0]."""
+    n = len(data) // BLOCK_SIZE
+    blocks = struct.unpack('>%dQ' % n, data[:n * BLOCK_SIZE])
+    keys = _subkeys
+    if _mode == 'ECB':
+        out = [des_encrypt_block_int(b, keys) for b in blocks]
+    else:
+        out = []
+        for b in blocks:
+            out.append(b ^ des_encrypt_block_int(counter, keys))
+            counter = (counter + 1) & MASK64
+    result = struct.pack('>%dQ' % n, *out)
+    tail = data[n * BLOCK_SIZE:]
+    if tail:  # CTR only: partial final block
+        keystream = des_encrypt_block_int(counter, keys).to_bytes(BLOCK_SIZE, 'big')
+        result += bytes(x ^ y for x, y in zip(tail, keystream))
+    return result
+
+
+def _process_segment(src_path, dst_path, offset, length, counter, pad):
+    """Worker task: read [offset, offset+length) from src, write the result at offset in dst."""
+    with open(src_path, 'rb') as src, open(dst_path, 'r+b') as dst:
+        mm = mmap.mmap(dst.fileno(), 0)
+        try:
+            src.seek(offset)
+            pos = offset
+            remaining = length
+            while True:
+                data = src.read(min(DEFAULT_CHUNK_SIZE, remaining)) if remaining else b''
+                remaining -= len(data)
+                if not remaining and pad:
+                    data = pkcs7_pad(data)
+                if not data:
+                    break
+                out = _crypt_chunk(data, counter)
+                mm[pos:pos + len(out)] = out
+                pos += len(out)
+                counter = (counter + len(data) // BLOCK_SIZE) & MASK64
+                if not remaining:
+                    break
+        finally:
+            mm.close()
+    return length
+
+
+def _segments(size, workers):
+    seg = max(MIN_SEGMENT_SIZE, -(-size // workers))
+    seg += -seg % BLOCK_SIZE
+    return [(off, min(seg, size - off)) for off in range(0, size, seg)]
+
+
+def _run(src_path, dst_path, key, mode, workers, nonce, encrypt):
+    mode = mode.upper()
+    if mode not in PARALLEL_MODES:
+        raise ValueError(f"Parallel mode must be one of {PARALLEL_MODES}, got {mode}")
+    if mode == 'CTR' and (nonce is None or len(nonce) != BLOCK_SIZE):
+        raise ValueError("CTR mode needs an 8-byte nonce")
+
+    subkeys = generate_subkeys_int(int.from_bytes(key, 'big'))
+    size = os.path.getsize(src_path)
+    if mode == 'ECB' and not encrypt and (size == 0 or size % BLOCK_SIZE):
+        raise ValueError("Ciphertext length must be a multiple of 8 bytes")
+
+    pad = mode == 'ECB' and encrypt
+    out_size = size + (BLOCK_SIZE - size % BLOCK_SIZE if pad else 0)
+    with open(dst_path, 'wb') as f:
+        f.truncate(out_size)
+    if not out_size:
+        return dst_path
+
+    # The last segment carries the PKCS#7 padding (an empty input still gets one block)
+    segments = _segments(size, workers) or [(0, 0)]
+
+    base = int.from_bytes(nonce, 'big') if mode == 'CTR' else 0
+    if not encrypt and mode == 'ECB':
+        subkeys = subkeys[::-1]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(subkeys, mode)) as pool:
+        futures = [
+            pool.submit(_process_segment, src_path, dst_path, off, length,
+                        (base + off // BLOCK_SIZE) & MASK64, pad and i == len(segments) - 1)
+            for i, (off, length) in enumerate(segments)
+        ]
+        for fut in futures:
+            fut.result()
+
+    if mode == 'ECB' and not encrypt:
+        # Strip PKCS#7 padding from the last block
+        with open(dst_path, 'r+b') as f:
+            f.seek(size - BLOCK_SIZE)
+            last = pkcs7_unpad(f.read(BLOCK_SIZE))
+            f.truncate(size - BLOCK_SIZE + len(last))
+    return dst_path
+
+
+def parallel_encrypt(path, key, mode='CTR', workers=None, dst_path=None, nonce=None):
+    """Encrypt file at path with DES in ECB or CTR mode using a process pool.
+    Returns (destination path, nonce): the path defaults to path + '.enc'; in CTR mode
+    a random nonce is generated when none is given (None for ECB)."""
+    workers = workers or os.cpu_count() or 1
+    if mode.upper() == 'CTR' and nonce is None:
+        nonce = os.urandom(BLOCK_SIZE)
+    return _run(path, dst_path or path + '.enc', key, mode, workers, nonce, True), nonce
+
+
+def parallel_decrypt(path, key, mode='CTR', workers=None, dst_path=None, nonce=None):
+    """Inverse of parallel_encrypt. Returns the destination path (defaults to path + '.dec')."""
+    workers = workers or os.cpu_count() or 1
+    return _run(path, dst_path or path + '.dec', key, mode, workers, nonce, False)
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    if len(sys.argv) < 6 or sys.argv[1] not in ('enc', 'dec'):
+        print("Usage: python des_parallel.py enc|dec ECB|CTR KEY_HEX NONCE_HEX|- INPUT [OUTPUT] [WORKERS]")
+        sys.exit(1)
+
+    action, mode, key_hex, nonce_hex, src = sys.argv[1:6]
+    dst = sys.argv[6] if len(sys.argv) > 6 else None
+    workers = int(sys.argv[7]) if len(sys.argv) > 7 else None
+    nonce = None if nonce_hex == '-' else bytes.fromhex(nonce_hex)
+    func = parallel_encrypt if action == 'enc' else parallel_decrypt
+
+    start = time.perf_counter()
+    out = func(src, bytes.fromhex(key_hex), mode, workers, dst, nonce)
+    elapsed = time.perf_counter() - start
+    if action == 'enc':
+        out, nonce = out
+        if nonce is not None and nonce_hex == '-':
+            print(f"Generated nonce: {nonce.hex().upper()} (needed to decrypt)")
+    mb = os.path.getsize(src) / (1 << 20)
+    print(f"{mode.upper()} {action}: {src} -> {out} ({mb:.2f} MB in {elapsed:.2f}s, {mb / elapsed:.2f} MB/s)")
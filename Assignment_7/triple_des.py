@@ -0,0 +1,113 @@
+"""
+Triple DES (EDE3) built on the DES key schedule
+- C = E_K3(D_K2(E_K1(P))),  P = D_K1(E_K2(D_K3(C)))
+- 24-byte keys give three independent keys, 16-byte keys reuse K1 as K3
+- Expanded subkey schedules are kept in an LRU cache keyed by the 8-byte DES key,
+  so traffic that reuses a small set of keys skips PC-1/PC-2 and the 16 shifts
+- TripleDESCipher plugs into the ECB/CBC/CTR modes of des_modes.DESCipher
+"""
+
+import sys
+from collections import OrderedDict
+
+from DES import generate_subkeys_int, des_encrypt_block_int
+from des_modes import DESCipher, BLOCK_SIZE
+
+DEFAULT_CACHE_SIZE = 128
+
+
+class SubkeyCache:
+    """LRU cache: 8-byte DES key -> (subkeys, reversed subkeys)."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        subkeys = generate_subkeys_int(int.from_bytes(key, 'big'))
+        entry = (subkeys, subkeys[::-1])
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+SUBKEY_CACHE = SubkeyCache()
+
+
+def split_3des_key(key):
+    if len(key) == 24:
+        return key[:8], key[8:16], key[16:]
+    if len(key) == 16:
+        return key[:8], key[8:], key[:8]
+    raise ValueError("3DES key must be 16 or 24 bytes")
+
+
+def tdes_schedules(key, cache=SUBKEY_CACHE):
+    """Return the three (subkeys, reversed subkeys) pairs for a 3DES key."""
+    return tuple(cache.get(k) for k in split_3des_key(key))
+
+
+def tdes_encrypt_block(block64, schedules):
+    (k1, _), (_, k2_inv), (k3, _) = schedules
+    block64 = des_encrypt_block_int(block64, k1)
+    block64 = des_encrypt_block_int(block64, k2_inv)
+    return des_encrypt_block_int(block64, k3)
+
+
+def tdes_decrypt_block(block64, schedules):
+    (_, k1_inv), (k2, _), (_, k3_inv) = schedules
+    block64 = des_encrypt_block_int(block64, k3_inv)
+    block64 = des_encrypt_block_int(block64, k2)
+    return des_encrypt_block_int(block64, k1_inv)
+
+
+class TripleDESCipher(DESCipher):
+    """3DES-EDE in ECB, CBC or CTR mode (same API as DESCipher)."""
+
+    def _expand_key(self, key):
+        self.schedules = tdes_schedules(key)
+
+    def _encrypt_block(self, block):
+        return tdes_encrypt_block(block, self.schedules)
+
+    def _decrypt_block(self, block):
+        return tdes_decrypt_block(block, self.schedules)
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    print("\n===== TRIPLE DES (EDE3) =====")
+    key_hex = input("Enter 3DES key in HEX (32 or 48 chars): ").strip()
+    plaintext_hex = input("Enter 64-bit plaintext in HEX (16 chars): ").strip()
+
+    if len(plaintext_hex) != BLOCK_SIZE * 2:
+        print("Plaintext must be 16 hex characters.")
+        sys.exit(1)
+
+    schedules = tdes_schedules(bytes.fromhex(key_hex))
+    ciphertext = tdes_encrypt_block(int(plaintext_hex, 16), schedules)
+    decrypted = tdes_decrypt_block(ciphertext, schedules)
+
+    print("\n---- RESULTS ----")
+    print("Plaintext (HEX): ", plaintext_hex.upper())
+    print("Ciphertext (HEX): ", format(ciphertext, '016X'))
+    print("Decrypted  (HEX): ", format(decrypted, '016X'))
+    print("=================")
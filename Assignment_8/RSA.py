@@ -1,75 +1,271 @@
 # RSA Algorithm Implementation (Automatic e Selection)
 
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from math import gcd
 
+DEFAULT_E = 65537
+MILLER_RABIN_ROUNDS = 40
+PRIME_SEARCH_WINDOW = 8192  # odd candidates sieved per worker task
+
+
 def mod_inverse(e, phi):
-    """Compute modular inverse of e mod phi using Extended Euclidean Algorithm."""
-    def egcd(a, b):
-        if b == 0:
-            return a, 1, 0
-        else:
-            g, x, y = egcd(b, a % b)
-            return g, y, x - (a // b) * y
+    """Compute modular inverse of e mod phi using the iterative Extended Euclidean Algorithm."""
+    old_r, r = e % phi, phi
+    old_x, x = 1, 0
+    while r:
+        quotient = old_r // r
+        old_r, r = r, old_r - quotient * r
+        old_x, x = x, old_x - quotient * x
 
-    g, x, y = egcd(e, phi)
-    if g != 1:
+    if old_r != 1:
         raise Exception("Modular inverse does not exist")
     else:
-        return x % phi
+        return old_x % phi
+
+
+# ----------- PRIME GENERATION -----------
+
+def _sieve(limit):
+    is_prime = bytearray([1]) * (limit + 1)
+    is_prime[0] = is_prime[1] = 0
+    for i in range(2, int(limit ** 0.5) + 1):
+        if is_prime[i]:
+            is_prime[i * i::i] = bytearray(len(range(i * i, limit + 1, i)))
+    return [i for i in range(limit + 1) if is_prime[i]]
+
+
+SMALL_PRIMES = _sieve(2000)
+
+
+def is_probable_prime(n, rounds=MILLER_RABIN_ROUNDS):
+    """Trial division by small primes, then Miller-Rabin with random bases."""
+    if n < 2:
+        return False
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for _ in range(rounds):
+        a = secrets.randbelow(n - 3) + 2
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def search_prime(bits, e=DEFAULT_E, window=PRIME_SEARCH_WINDOW):
+    """Sieve `window` odd candidates upward from a random bits-long start against the
+    small primes, then Miller-Rabin the survivors in order.
+    Returns a prime p with gcd(e, p - 1) == 1, or None if the window has none."""
+    # Top two bits set so that the product of two such primes has exactly 2*bits bits
+    start = secrets.randbits(bits) | (3 << (bits - 2)) | 1
+    composite = bytearray(window)
+    for p in SMALL_PRIMES[1:]:
+        # index i of candidate start + 2*i that p divides
+        i = (-start * ((p + 1) // 2)) % p
+        if start + 2 * i == p:
+            i += p
+        composite[i::p] = b'\x01' * len(range(i, window, p))
+
+    for i in range(window):
+        if composite[i]:
+            continue
+        candidate = start + 2 * i
+        if candidate.bit_length() > bits:
+            return None
+        if candidate % e != 1 and is_probable_prime(candidate):
+            return candidate
+    return None
+
+
+def generate_prime(bits, e=DEFAULT_E):
+    while True:
+        p = search_prime(bits, e)
+        if p:
+            return p
+
+
+def generate_primes(bits, count, e=DEFAULT_E, workers=None):
+    """Find `count` distinct primes, keeping `workers` search tasks running in a process pool."""
+    if workers == 1:
+        primes = set()
+        while len(primes) < count:
+            primes.add(generate_prime(bits, e))
+        return list(primes)
+
+    primes = set()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(search_prime, bits, e) for _ in range(workers)}
+        while len(primes) < count:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.result():
+                    primes.add(fut.result())
+                if len(primes) < count:
+                    pending.add(pool.submit(search_prime, bits, e))
+        for fut in pending:
+            fut.cancel()
+    return list(primes)[:count]
+
+
+# ----------- KEYS -----------
+
+class RSAKey:
+    """RSA key pair. Public part is (e, n); d, p and q are None for public-only keys.
+    When p and q are known the CRT parameters dp, dq and qinv are precomputed."""
+
+    def __init__(self, n, e, d=None, p=None, q=None):
+        self.n = n
+        self.e = e
+        self.d = d
+        self.p = p
+        self.q = q
+        if d is not None and p and q:
+            self.dp = d % (p - 1)
+            self.dq = d % (q - 1)
+            self.qinv = mod_inverse(q, p)
+        else:
+            self.dp = self.dq = self.qinv = None
+
+    @property
+    def bits(self):
+        return self.n.bit_length()
+
+    @property
+    def has_private(self):
+        return self.d is not None
+
+    def public_key(self):
+        return RSAKey(self.n, self.e)
+
+    def encrypt(self, m):
+        if not 0 <= m < self.n:
+            raise ValueError("Message must be in range 0 .. n-1")
+        return pow(m, self.e, self.n)
+
+    def decrypt(self, c):
+        """c^d mod n, via the Chinese Remainder Theorem when p and q are known."""
+        if not self.has_private:
+            raise ValueError("Private key required")
+        if self.qinv is None:
+            return pow(c, self.d, self.n)
+        # Garner's recombination: two half-size exponentiations instead of one full one
+        m1 = pow(c, self.dp, self.p)
+        m2 = pow(c, self.dq, self.q)
+        h = (self.qinv * (m1 - m2)) % self.p
+        return m2 + h * self.q
+
+    def decrypt_plain(self, c):
+        """c^d mod n over the full modulus (no CRT)."""
+        if not self.has_private:
+            raise ValueError("Private key required")
+        return pow(c, self.d, self.n)
+
+    def sign(self, m):
+        """Raw RSA signature m^d mod n (CRT path)."""
+        if not 0 <= m < self.n:
+            raise ValueError("Message must be in range 0 .. n-1")
+        return self.decrypt(m)
+
+    def verify(self, m, s):
+        return pow(s, self.e, self.n) == m
+
+    def __repr__(self):
+        kind = "private" if self.has_private else "public"
+        return f"RSAKey({self.bits}-bit {kind}, e={self.e})"
+
+
+def key_from_primes(p, q, e=DEFAULT_E):
+    phi = (p - 1) * (q - 1)
+    return RSAKey(p * q, e, mod_inverse(e, phi), p, q)
+
+
+def generate_keypair(bits=2048, e=DEFAULT_E, workers=None):
+    """Generate an RSA key with a `bits`-bit modulus. Prime search runs across
+    `workers` processes (None = one per CPU, 1 = in-process)."""
+    if bits < 16 or bits % 2:
+        raise ValueError("Key size must be an even number of bits >= 16")
+    p, q = generate_primes(bits // 2, 2, e, workers)
+    return key_from_primes(max(p, q), min(p, q), e)
 
 
 # ----------- MAIN PROGRAM -----------
 
-print("------- RSA Algorithm Implementation -------")
-
-# Input primes
-p = int(input("Enter first prime number (p): "))
-q = int(input("Enter second prime number (q): "))
-
-if p <= 1 or q <= 1:
-    print("p and q must be > 1.")
-    exit()
-
-# n and phi
-n = p * q
-phi = (p - 1) * (q - 1)
-
-print(f"\nn = p * q = {n}")
-print(f"phi(n) = (p-1)*(q-1) = {phi}")
-
-# Automatically choose e: smallest integer >1 with gcd(e, phi) = 1
-e = 2
-while e < phi:
-    if gcd(e, phi) == 1:
-        break
-    e += 1
-
-if gcd(e, phi) != 1:
-    print("Failed to find suitable e. Choose different primes.")
-    exit()
-
-# Calculate d = e^(-1) mod phi
-try:
-    d = mod_inverse(e, phi)
-except Exception as ex:
-    print("Error:", ex)
-    exit()
-
-print(f"\nAutomatically chosen e = {e}")
-print(f"Calculated d = {d}")
-print(f"Public Key (e, n) = ({e}, {n})")
-print(f"Private Key (d, n) = ({d}, {n})")
-
-# Input message
-msg = int(input("\nEnter the message (as integer, 0 < m < n): "))
-if msg <= 0 or msg >= n:
-    print("Message must be in range 1 .. n-1.")
-    exit()
-
-# Encryption: c = m^e mod n
-cipher = pow(msg, e, n)
-print(f"Encrypted Ciphertext = {cipher}")
-
-# Decryption: m = c^d mod n
-plain = pow(cipher, d, n)
-print(f"Decrypted Message = {plain}")
+if __name__ == "__main__":
+    print("------- RSA Algorithm Implementation -------")
+
+    size = input("Enter key size in bits (1024-4096), or press Enter to type p and q: ").strip()
+
+    if size:
+        key = generate_keypair(int(size))
+        p, q, n, e, d = key.p, key.q, key.n, key.e, key.d
+        phi = (p - 1) * (q - 1)
+        print(f"\nGenerated {key.bits}-bit modulus")
+        print(f"phi(n) = (p-1)*(q-1) = {phi}")
+    else:
+        # Input primes
+        p = int(input("Enter first prime number (p): "))
+        q = int(input("Enter second prime number (q): "))
+
+        if p <= 1 or q <= 1:
+            print("p and q must be > 1.")
+            exit()
+
+        # n and phi
+        n = p * q
+        phi = (p - 1) * (q - 1)
+
+        print(f"\nn = p * q = {n}")
+        print(f"phi(n) = (p-1)*(q-1) = {phi}")
+
+        # Automatically choose e: smallest integer >1 with gcd(e, phi) = 1
+        e = 2
+        while e < phi:
+            if gcd(e, phi) == 1:
+                break
+            e += 1
+
+        if gcd(e, phi) != 1:
+            print("Failed to find suitable e. Choose different primes.")
+            exit()
+
+        # Calculate d = e^(-1) mod phi
+        try:
+            d = mod_inverse(e, phi)
+        except Exception as ex:
+            print("Error:", ex)
+            exit()
+
+        print(f"\nAutomatically chosen e = {e}")
+
+    print(f"Calculated d = {d}")
+    print(f"Public Key (e, n) = ({e}, {n})")
+    print(f"Private Key (d, n) = ({d}, {n})")
+
+    # Input message
+    msg = int(input("\nEnter the message (as integer, 0 < m < n): "))
+    if msg <= 0 or msg >= n:
+        print("Message must be in range 1 .. n-1.")
+        exit()
+
+    # Encryption: c = m^e mod n
+    cipher = pow(msg, e, n)
+    print(f"Encrypted Ciphertext = {cipher}")
+
+    # Decryption: m = c^d mod n
+    plain = pow(cipher, d, n)
+    print(f"Decrypted Message = {plain}")
@@ -0,0 +1,143 @@
+"""
+Hybrid RSA + DES/3DES envelope encryption
+- A random session key is wrapped once with RSA-OAEP (rsa_padding.py)
+- The payload is streamed through DESCipher / TripleDESCipher (Assignment_7)
+  in CBC or CTR mode, so large files run at symmetric-cipher speed
+- Binary layout:
+    magic 'RSAE' | version (1) | cipher id (1) | mode id (1) | reserved (1)
+    | wrapped key length (2, big-endian) | IV / nonce (8) | wrapped key | payload
+- No MAC: the envelope gives confidentiality only. Nothing detects tampering, and
+  CTR payloads are malleable (flipping a ciphertext bit flips the same plaintext
+  bit); authenticate the file separately (e.g. rsa_sign.py) if that matters
+- Layout: this file must sit next to RSA.py / rsa_padding.py, with the DES modules
+  in ../Assignment_7; both directories are found relative to this file, so it
+  works from any working directory
+
+Usage: python envelope.py seal|open KEY_FILE INPUT OUTPUT
+  (KEY_FILE is JSON with n, e and, for open, d, p, q as integers)
+"""
+
+import io
+import json
+import os
+import struct
+import sys
+
+
+def _use_sibling_modules(*dirs):
+    """Make modules in this directory and in ../<dir> importable, wherever we run from."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for path in [here] + [os.path.normpath(os.path.join(here, '..', d)) for d in dirs]:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+_use_sibling_modules('Assignment_7')
+
+from des_modes import DESCipher, BLOCK_SIZE, DEFAULT_CHUNK_SIZE  # noqa: E402
+from triple_des import TripleDESCipher  # noqa: E402
+
+from RSA import RSAKey  # noqa: E402
+from rsa_padding import decrypt_bytes, encrypt_bytes  # noqa: E402
+
+MAGIC = b'RSAE'
+VERSION = 1
+HEADER = struct.Struct('>4sBBBBH8s')
+
+# cipher id -> (name, class, session key length)
+CIPHERS = {
+    1: ('DES', DESCipher, 8),
+    2: ('3DES', TripleDESCipher, 24),
+}
+CIPHER_IDS = {name: cid for cid, (name, _, _) in CIPHERS.items()}
+MODE_IDS = {'CBC': 1, 'CTR': 2}
+MODES = {mid: name for name, mid in MODE_IDS.items()}
+
+
+def seal_stream(public_key, src, dst, cipher='3DES', mode='CTR', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write header + wrapped session key + encrypted payload from src to dst.
+    Returns total bytes written."""
+    cipher, mode = cipher.upper(), mode.upper()
+    if cipher not in CIPHER_IDS:
+        raise ValueError(f"Unsupported cipher: {cipher}")
+    if mode not in MODE_IDS:
+        raise ValueError(f"Envelope mode must be CBC or CTR, got {mode}")
+    cipher_id = CIPHER_IDS[cipher]
+    _, cipher_cls, key_len = CIPHERS[cipher_id]
+
+    session_key = os.urandom(key_len)
+    iv = os.urandom(BLOCK_SIZE)
+    wrapped = encrypt_bytes(public_key, session_key)
+
+    header = HEADER.pack(MAGIC, VERSION, cipher_id, MODE_IDS[mode], 0, len(wrapped), iv)
+    dst.write(header)
+    dst.write(wrapped)
+    body = cipher_cls(session_key, mode, iv).encrypt_stream(src, dst, chunk_size)
+    return len(header) + len(wrapped) + body
+
+
+def read_header(src):
+    """Parse the envelope header. Returns (cipher name, mode, iv, wrapped key)."""
+    raw = src.read(HEADER.size)
+    if len(raw) != HEADER.size:
+        raise ValueError("Truncated envelope header")
+    magic, version, cipher_id, mode_id, _, wrapped_len, iv = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a supported envelope")
+    if cipher_id not in CIPHERS or mode_id not in MODES:
+        raise ValueError("Unknown cipher or mode in envelope header")
+    wrapped = src.read(wrapped_len)
+    if len(wrapped) != wrapped_len:
+        raise ValueError("Truncated envelope key block")
+    return CIPHERS[cipher_id][0], MODES[mode_id], iv, wrapped
+
+
+def open_stream(private_key, src, dst, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Unwrap the session key and decrypt the payload from src to dst. Returns bytes written."""
+    cipher, mode, iv, wrapped = read_header(src)
+    _, cipher_cls, key_len = CIPHERS[CIPHER_IDS[cipher]]
+    session_key = decrypt_bytes(private_key, wrapped)
+    if len(session_key) != key_len:
+        raise ValueError("Bad session key length")
+    return cipher_cls(session_key, mode, iv).decrypt_stream(src, dst, chunk_size)
+
+
+def seal_file(public_key, src_path, dst_path, cipher='3DES', mode='CTR'):
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        return seal_stream(public_key, src, dst, cipher, mode)
+
+
+def open_file(private_key, src_path, dst_path):
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        return open_stream(private_key, src, dst)
+
+
+def seal_bytes(public_key, data, cipher='3DES', mode='CTR'):
+    out = io.BytesIO()
+    seal_stream(public_key, io.BytesIO(data), out, cipher, mode)
+    return out.getvalue()
+
+
+def open_bytes(private_key, data):
+    out = io.BytesIO()
+    open_stream(private_key, io.BytesIO(data), out)
+    return out.getvalue()
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    if len(sys.argv) != 5 or sys.argv[1] not in ('seal', 'open'):
+        print("Usage: python envelope.py seal|open KEY_FILE INPUT OUTPUT")
+        sys.exit(1)
+
+    action, key_path, src_path, dst_path = sys.argv[1:]
+    with open(key_path) as f:
+        fields = json.load(f)
+    key = RSAKey(fields['n'], fields['e'], fields.get('d'), fields.get('p'), fields.get('q'))
+
+    if action == 'seal':
+        n = seal_file(key, src_path, dst_path)
+    else:
+        n = open_file(key, src_path, dst_path)
+    print(f"{action}: wrote {n} bytes to {dst_path}")
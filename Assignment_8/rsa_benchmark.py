@@ -0,0 +1,67 @@
+"""
+RSA private-key benchmark: CRT decryption vs plain c^d mod n
+- Generates one key per size, checks both paths agree, then times each
+- Results are printed (or written) as JSON
+
+Usage: python rsa_benchmark.py [--sizes 1024,2048,4096] [--ops 200] [--output FILE]
+"""
+
+import argparse
+import json
+import platform
+import secrets
+import sys
+import time
+
+from RSA import generate_keypair
+
+
+def time_ops(func, values):
+    start = time.perf_counter()
+    for v in values:
+        func(v)
+    return time.perf_counter() - start
+
+
+def run(sizes, ops):
+    results = []
+    for bits in sizes:
+        key = generate_keypair(bits)
+        ciphertexts = [key.encrypt(secrets.randbelow(key.n - 2) + 1) for _ in range(ops)]
+        if any(key.decrypt(c) != key.decrypt_plain(c) for c in ciphertexts[:10]):
+            raise AssertionError(f"CRT and plain decryption disagree for {bits}-bit key")
+
+        plain = time_ops(key.decrypt_plain, ciphertexts)
+        crt = time_ops(key.decrypt, ciphertexts)
+        results.append({
+            "bits": bits,
+            "ops": ops,
+            "plain_ops_per_sec": round(ops / plain, 1),
+            "crt_ops_per_sec": round(ops / crt, 1),
+            "speedup": round(plain / crt, 2),
+        })
+        print(f"  {bits}-bit: plain {ops / plain:.1f}/s, CRT {ops / crt:.1f}/s", file=sys.stderr)
+    return results
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RSA CRT vs plain decryption benchmark")
+    parser.add_argument("--sizes", default="1024,2048,4096", help="comma-separated key sizes in bits")
+    parser.add_argument("--ops", type=int, default=200, help="decryptions per key size")
+    parser.add_argument("--output", help="write JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "results": run([int(s) for s in args.sizes.split(",")], args.ops),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,211 @@
+"""
+RSA encryption of byte strings (PKCS#1 v2.2 / RFC 8017)
+- OAEP with MGF1 (SHA-256 by default) and legacy PKCS#1 v1.5 padding
+- Messages longer than one block are split into chunks, each chunk becomes one
+  k-byte ciphertext block (k = modulus length in bytes)
+- batch_encrypt / batch_decrypt process many messages against one key in a
+  process pool; the key (with its CRT parameters) is sent once per worker
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+OAEP = 'OAEP'
+PKCS1_V15 = 'PKCS1v15'
+SCHEMES = (OAEP, PKCS1_V15)
+DEFAULT_HASH = 'sha256'
+BATCH_CHUNKSIZE = 64
+
+
+#  PRIMITIVES
+
+def i2osp(x, length):
+    return x.to_bytes(length, 'big')
+
+
+def os2ip(data):
+    return int.from_bytes(data, 'big')
+
+
+def key_length(key):
+    return (key.n.bit_length() + 7) // 8
+
+
+def mgf1(seed, length, hash_name=DEFAULT_HASH):
+    out = []
+    size = 0
+    counter = 0
+    while size < length:
+        block = hashlib.new(hash_name, seed + counter.to_bytes(4, 'big')).digest()
+        out.append(block)
+        size += len(block)
+        counter += 1
+    return b''.join(out)[:length]
+
+
+def _xor(a, b):
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+
+#  OAEP
+
+def oaep_max_length(key, hash_name=DEFAULT_HASH):
+    return key_length(key) - 2 * hashlib.new(hash_name).digest_size - 2
+
+
+def oaep_encode(message, k, label=b'', hash_name=DEFAULT_HASH):
+    h_len = hashlib.new(hash_name).digest_size
+    if len(message) > k - 2 * h_len - 2:
+        raise ValueError("Message too long")
+    l_hash = hashlib.new(hash_name, label).digest()
+    ps = b'\x00' * (k - len(message) - 2 * h_len - 2)
+    db = l_hash + ps + b'\x01' + message
+    seed = os.urandom(h_len)
+    masked_db = _xor(db, mgf1(seed, k - h_len - 1, hash_name))
+    masked_seed = _xor(seed, mgf1(masked_db, h_len, hash_name))
+    return b'\x00' + masked_seed + masked_db
+
+
+def oaep_decode(em, k, label=b'', hash_name=DEFAULT_HASH):
+    h_len = hashlib.new(hash_name).digest_size
+    if k < 2 * h_len + 2 or len(em) != k:
+        raise ValueError("Decryption error")
+    l_hash = hashlib.new(hash_name, label).digest()
+    y, masked_seed, masked_db = em[0], em[1:h_len + 1], em[h_len + 1:]
+    seed = _xor(masked_seed, mgf1(masked_db, h_len, hash_name))
+    db = _xor(masked_db, mgf1(seed, k - h_len - 1, hash_name))
+    sep = db.find(b'\x01', h_len)
+    # Single error for every failure so the cause is not observable
+    if y != 0 or db[:h_len] != l_hash or sep < 0 or db[h_len:sep].strip(b'\x00'):
+        raise ValueError("Decryption error")
+    return db[sep + 1:]
+
+
+#  PKCS#1 v1.5
+
+def pkcs1_v15_max_length(key):
+    return key_length(key) - 11
+
+
+def pkcs1_v15_encode(message, k):
+    if len(message) > k - 11:
+        raise ValueError("Message too long")
+    ps = bytearray()
+    while len(ps) < k - len(message) - 3:
+        ps += os.urandom(k - len(message) - 3 - len(ps)).replace(b'\x00', b'')
+    return b'\x00\x02' + bytes(ps) + b'\x00' + message
+
+
+def pkcs1_v15_decode(em, k):
+    sep = em.find(b'\x00', 2)
+    if len(em) != k or em[:2] != b'\x00\x02' or sep < 10:
+        raise ValueError("Decryption error")
+    return em[sep + 1:]
+
+
+#  BYTES API
+
+def max_chunk_length(key, scheme=OAEP, hash_name=DEFAULT_HASH):
+    if scheme == OAEP:
+        return oaep_max_length(key, hash_name)
+    if scheme == PKCS1_V15:
+        return pkcs1_v15_max_length(key)
+    raise ValueError(f"Unknown padding scheme: {scheme}")
+
+
+def encrypt_bytes(key, message, scheme=OAEP, label=b'', hash_name=DEFAULT_HASH):
+    """Pad and encrypt message; long messages become several k-byte blocks."""
+    k = key_length(key)
+    size = max_chunk_length(key, scheme, hash_name)
+    if size < 1:
+        raise ValueError("Key too small for this padding scheme")
+    out = []
+    for i in range(0, max(len(message), 1), size):
+        chunk = message[i:i + size]
+        if scheme == OAEP:
+            em = oaep_encode(chunk, k, label, hash_name)
+        else:
+            em = pkcs1_v15_encode(chunk, k)
+        out.append(i2osp(key.encrypt(os2ip(em)), k))
+    return b''.join(out)
+
+
+def decrypt_bytes(key, ciphertext, scheme=OAEP, label=b'', hash_name=DEFAULT_HASH):
+    k = key_length(key)
+    if not ciphertext or len(ciphertext) % k:
+        raise ValueError("Decryption error")
+    out = []
+    for i in range(0, len(ciphertext), k):
+        c = os2ip(ciphertext[i:i + k])
+        if c >= key.n:
+            raise ValueError("Decryption error")
+        em = i2osp(key.decrypt(c), k)
+        if scheme == OAEP:
+            out.append(oaep_decode(em, k, label, hash_name))
+        elif scheme == PKCS1_V15:
+            out.append(pkcs1_v15_decode(em, k))
+        else:
+            raise ValueError(f"Unknown padding scheme: {scheme}")
+    return b''.join(out)
+
+
+#  BATCH API
+
+# Per-worker state set by _init_worker
+_key = None
+_options = None
+
+
+def _init_worker(key, scheme, label, hash_name):
+    global _key, _options
+    _key = key
+    _options = (scheme, label, hash_name)
+
+
+def _encrypt_one(message):
+    return encrypt_bytes(_key, message, *_options)
+
+
+def _decrypt_one(ciphertext):
+    return decrypt_bytes(_key, ciphertext, *_options)
+
+
+def _batch(func, key, items, scheme, label, hash_name, workers, chunksize):
+    if workers == 1:
+        _init_worker(key, scheme, label, hash_name)
+        return [func(item) for item in items]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(key, scheme, label, hash_name)) as pool:
+        return list(pool.map(func, items, chunksize=chunksize))
+
+
+def batch_encrypt(key, messages, scheme=OAEP, label=b'', hash_name=DEFAULT_HASH,
+                  workers=None, chunksize=BATCH_CHUNKSIZE):
+    """Encrypt a list of byte messages with one public key, preserving order."""
+    return _batch(_encrypt_one, key.public_key(), messages, scheme, label, hash_name,
+                  workers, chunksize)
+
+
+def batch_decrypt(key, ciphertexts, scheme=OAEP, label=b'', hash_name=DEFAULT_HASH,
+                  workers=None, chunksize=BATCH_CHUNKSIZE):
+    """Decrypt a list of ciphertexts with one private key (CRT path), preserving order."""
+    if not key.has_private:
+        raise ValueError("Private key required")
+    return _batch(_decrypt_one, key, ciphertexts, scheme, label, hash_name, workers, chunksize)
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    from RSA import generate_keypair
+
+    print("------- RSA OAEP / PKCS#1 v1.5 -------")
+    bits = int(input("Enter key size in bits (e.g. 2048): ").strip() or 2048)
+    scheme = input("Padding scheme (OAEP / PKCS1v15) [OAEP]: ").strip() or OAEP
+    message = input("Enter the message: ").encode()
+
+    key = generate_keypair(bits)
+    ciphertext = encrypt_bytes(key, message, scheme)
+    print(f"\nCiphertext ({len(ciphertext)} bytes): {ciphertext.hex()}")
+    print("Decrypted Message:", decrypt_bytes(key, ciphertext, scheme).decode())
@@ -0,0 +1,241 @@
+"""
+Append-only transaction log + periodic snapshots for account balances
+- Every change is one JSON line [op, account, amount, balance] appended to the log,
+  so a transaction costs O(1) I/O instead of rewriting the whole accounts file
+- Appends are buffered and fsync'd in groups (group commit): a background thread
+  flushes every `flush_interval` seconds, or sooner once `group_size` records wait
+  or someone waits on a record
+- record() / record_many() return a ticket (sequence number). A change is only
+  durable once its ticket is: callers that acknowledge it to a client first call
+  wait_durable(ticket), or when_durable(ticket, callback) from an event loop.
+  Records appended while one fsync runs go out together in the next one
+- After `snapshot_every` records the log is rotated and the current balances are
+  written to the snapshot file in the background (tmp file + os.replace)
+- Recovery loads the snapshot and replays the rotated log (if a compaction was
+  interrupted) and then the live log; records carry the resulting balance, so
+  replaying a record twice is harmless
+"""
+
+import json
+import os
+import threading
+
+DEFAULT_FLUSH_INTERVAL = 0.05  # seconds between group commits
+DEFAULT_GROUP_SIZE = 512       # records that trigger an early flush
+DEFAULT_SNAPSHOT_EVERY = 100000
+
+
+def _replay(path, accounts):
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                op, account, amount, balance = json.loads(line)
+            except ValueError:
+                break  # torn final line from a crash mid-write
+            accounts[account] = balance
+            count += 1
+    return count
+
+
+def _write_snapshot(path, accounts, chunk=65536):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        if isinstance(accounts, dict):
+            json.dump(accounts, f)
+        else:
+            # Other mappings (e.g. array-backed balances) are streamed instead of
+            # being turned into a dict first
+            f.write('{')
+            sep = ''
+            parts = []
+            for account, balance in accounts.items():
+                parts.append(f'{json.dumps(account)}: {balance}')
+                if len(parts) == chunk:
+                    f.write(sep + ', '.join(parts))
+                    sep, parts = ', ', []
+            if parts:
+                f.write(sep + ', '.join(parts))
+            f.write('}')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class AccountJournal:
+    """Write-ahead log for an {account: balance} dict."""
+
+    def __init__(self, snapshot_path, log_path=None, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 group_size=DEFAULT_GROUP_SIZE, snapshot_every=DEFAULT_SNAPSHOT_EVERY, container=dict):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path or snapshot_path + '.log'
+        self.old_log_path = self.log_path + '.old'
+        self.flush_interval = flush_interval
+        self.group_size = group_size
+        self.snapshot_every = snapshot_every
+        self.container = container  # mapping type recover() fills (needs update() and copy())
+        self.accounts = None
+        self._buffer = []
+        self._appended = 0   # ticket of the last record appended
+        self._durable = 0    # ticket of the last record fsync'd
+        self._waiters = []   # (ticket, callback) waiting for an fsync
+        self._since_snapshot = 0
+        self._lock = threading.Lock()     # buffer, tickets and waiters
+        self._io_lock = threading.Lock()  # the log file (held across write + fsync)
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._log = None
+        self._flusher = None
+        self._snapshotter = None
+
+    def recover(self):
+        """Load snapshot + replay logs, open the log for appends and start the flusher.
+        Returns the accounts dict, which the caller mutates and reports via record()."""
+        accounts = self.container()
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                accounts.update(json.load(f))
+        interrupted = os.path.exists(self.old_log_path)
+        _replay(self.old_log_path, accounts)
+        self._since_snapshot = _replay(self.log_path, accounts)
+        if interrupted:
+            # Finish the compaction that was cut short before the old log can be reused
+            _write_snapshot(self.snapshot_path, accounts)
+            os.remove(self.old_log_path)
+
+        self.accounts = accounts
+        self._log = open(self.log_path, 'a')
+        self._flusher = threading.Thread(target=self._flush_loop, name='journal-flush', daemon=True)
+        self._flusher.start()
+        return accounts
+
+    def record(self, op, account, amount, balance):
+        """Append one change; op is b'CR' / b'DB' / b'NEW' (or the str form).
+        Returns its ticket; the change is not on disk until wait_durable(ticket)."""
+        if isinstance(op, bytes):
+            op = op.decode()
+        line = json.dumps([op, account, amount, balance]) + '\n'
+        with self._lock:
+            self._buffer.append(line)
+            self._appended += 1
+            ticket = self._appended
+            pending = len(self._buffer)
+        if pending >= self.group_size:
+            self._wakeup.set()
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+        return ticket
+
+    def record_many(self, records):
+        """Append a batch of (op, account, amount, balance) changes; they reach the log
+        in the same group commit, so recovery sees all of them or a prefix.
+        Returns the ticket of the last one."""
+        lines = [json.dumps([op.decode() if isinstance(op, bytes) else op, account, amount, balance])
+                 for op, account, amount, balance in records]
+        with self._lock:
+            if lines:
+                self._buffer.append('\n'.join(lines) + '\n')
+                self._appended += 1
+            ticket = self._appended
+        if not lines:
+            return ticket
+        self._wakeup.set()
+        self._since_snapshot += len(lines)
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+        return ticket
+
+    def last_ticket(self):
+        """Ticket covering every change recorded so far."""
+        return self._appended
+
+    def when_durable(self, ticket, callback):
+        """Arrange for callback() to run (on the flusher thread) once `ticket` is fsync'd.
+        Returns False without calling it if that already happened."""
+        with self._lock:
+            if ticket <= self._durable:
+                return False
+            self._waiters.append((ticket, callback))
+        self._wakeup.set()  # somebody is waiting: don't sit out the flush interval
+        return True
+
+    def wait_durable(self, ticket):
+        """Block until `ticket` is fsync'd."""
+        done = threading.Event()
+        if self.when_durable(ticket, done.set):
+            done.wait()
+
+    def _write_buffer(self):
+        """Write out the buffer; call with _io_lock held. Returns the ticket written up to."""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            upto = self._appended
+        if lines:
+            self._log.write(''.join(lines))
+        return upto
+
+    def _mark_durable(self, upto):
+        with self._lock:
+            self._durable = max(self._durable, upto)
+            ready = [cb for t, cb in self._waiters if t <= self._durable]
+            self._waiters = [(t, cb) for t, cb in self._waiters if t > self._durable]
+        for callback in ready:
+            callback()
+
+    def flush(self):
+        """Write and fsync everything appended so far. record() is not blocked by the fsync."""
+        with self._io_lock:
+            if self._log is None or self._appended == self._durable:
+                return
+            upto = self._write_buffer()
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        self._mark_durable(upto)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def snapshot(self, wait=False):
+        """Rotate the log and write the current balances to the snapshot file.
+        The balances are copied here; serialization and I/O happen on a background thread."""
+        if self._snapshotter is not None and self._snapshotter.is_alive():
+            if not wait:
+                return
+            self._snapshotter.join()
+        with self._io_lock:
+            upto = self._write_buffer()
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._log.close()
+            os.replace(self.log_path, self.old_log_path)
+            self._log = open(self.log_path, 'a')
+            state = self.accounts.copy()
+        self._mark_durable(upto)
+        self._since_snapshot = 0
+
+        def write():
+            _write_snapshot(self.snapshot_path, state)
+            os.remove(self.old_log_path)
+
+        self._snapshotter = threading.Thread(target=write, name='journal-snapshot', daemon=True)
+        self._snapshotter.start()
+        if wait:
+            self._snapshotter.join()
+
+    def close(self):
+        """Flush, write a final snapshot and stop the background threads."""
+        if self._log is None:
+            return
+        self.snapshot(wait=True)
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join()
+        with self._io_lock:
+            self._log.close()
+            self._log = None
@@ -0,0 +1,213 @@
+"""
+Load generator and latency benchmark for server.py (wallet) and sayali/server.py (FASTag)
+- Speaks the interactive protocol the clients use (MAIN_MENU / NEW_USERNAME? /
+  USERNAME? text handshake, then 4-byte '>2sH' packets), with no input() prompts
+- N simulated clients are started over --ramp seconds; each one registers a fresh
+  account, runs --ops CR/DB packets, logs out, logs back in, runs --ops more,
+  logs out and exits
+- Every request is timed from send to reply; the report gives throughput and
+  p50 / p99 / p999 latency (ms) per request kind as JSON
+- --server wallet|fastag starts that server on loopback in a temp directory first
+  (STORE_BACKEND from --backend, SERVER_PORT from --port) and stops it afterwards
+
+Usage: python load_test.py [--server wallet] [--clients 200] [--ops 50] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import struct
+import tempfile
+import time
+import uuid
+
+from local_server import HOST, PORT, SERVERS, start_server
+
+PACKET = struct.Struct('>2sH')
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples):
+    values = sorted(samples)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else None,
+        "p50_ms": round(percentile(values, 50) * 1000, 3) if values else None,
+        "p99_ms": round(percentile(values, 99) * 1000, 3) if values else None,
+        "p999_ms": round(percentile(values, 99.9) * 1000, 3) if values else None,
+        "max_ms": round(values[-1] * 1000, 3) if values else None,
+    }
+
+
+class Stats:
+    def __init__(self):
+        self.latency = {"connect": [], "register": [], "login": [], "transaction": [], "logout": []}
+        self.rejected = 0   # ER replies (insufficient balance / over the limit)
+        self.failed = 0     # sessions that broke off with an error
+        self.errors = {}
+
+    def error(self, exc):
+        self.failed += 1
+        key = type(exc).__name__
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+class SimulatedClient:
+    """One scripted session over asyncio streams."""
+
+    def __init__(self, name, ops, credit_ratio, max_amount, stats):
+        self.name = name
+        self.ops = ops
+        self.credit_ratio = credit_ratio
+        self.max_amount = max_amount
+        self.stats = stats
+        self.reader = None
+        self.writer = None
+
+    async def request(self, kind, data, reply_size=None):
+        """Send data and wait for the reply (a text token, or reply_size bytes).
+        The round trip is recorded under kind unless kind is None."""
+        start = time.perf_counter()
+        self.writer.write(data)
+        if reply_size:
+            reply = await self.reader.readexactly(reply_size)
+        else:
+            reply = await self.reader.read(1024)
+            if not reply:
+                raise ConnectionError("server closed the connection")
+        if kind:
+            self.stats.latency[kind].append(time.perf_counter() - start)
+        return reply
+
+    async def expect(self, token):
+        reply = await self.reader.read(1024)
+        if not reply.startswith(token):
+            raise ValueError(f"expected {token!r}, got {reply[:40]!r}")
+
+    async def sign_in(self, choice, kind):
+        """Menu choice + name: two round trips, recorded as one sample."""
+        start = time.perf_counter()
+        prompt = await self.request(None, choice)
+        if not prompt.endswith(b"USERNAME?"):
+            raise ValueError(f"unexpected prompt {prompt[:40]!r}")
+        welcome = await self.request(None, self.name.encode())
+        if b"Balance" not in welcome:
+            raise ValueError(f"{kind} failed: {welcome[:60]!r}")
+        self.stats.latency[kind].append(time.perf_counter() - start)
+
+    async def transactions(self):
+        for _ in range(self.ops):
+            instr = b'CR' if random.random() < self.credit_ratio else b'DB'
+            amount = random.randint(1, self.max_amount)
+            code, _ = PACKET.unpack(await self.request("transaction", PACKET.pack(instr, amount), PACKET.size))
+            if code != b'BA':
+                self.stats.rejected += 1
+
+    async def logout(self):
+        reply = await self.request("logout", PACKET.pack(b'LO', 0))
+        if not reply.startswith(b"MAIN_MENU"):
+            raise ValueError(f"expected MAIN_MENU after logout, got {reply[:40]!r}")
+
+    async def run(self, host, port):
+        start = time.perf_counter()
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        try:
+            await self.expect(b"MAIN_MENU")
+            self.stats.latency["connect"].append(time.perf_counter() - start)
+            await self.sign_in(b"N", "register")
+            await self.transactions()
+            await self.logout()
+            await self.sign_in(b"E", "login")
+            await self.transactions()
+            await self.logout()
+            self.writer.write(b"X")
+            await self.expect(b"EXIT")
+        finally:
+            self.writer.close()
+
+
+async def run_load(host, port, clients, ops, ramp, credit_ratio, max_amount):
+    stats = Stats()
+    prefix = uuid.uuid4().hex[:8]
+
+    async def one(i):
+        await asyncio.sleep(ramp * i / clients)
+        try:
+            await SimulatedClient(f"load-{prefix}-{i}", ops, credit_ratio, max_amount, stats).run(host, port)
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            stats.error(e)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    requests = sum(len(v) for k, v in stats.latency.items() if k != "connect")
+    return {
+        "clients": clients,
+        "ops_per_login": ops,
+        "ramp_s": ramp,
+        "elapsed_s": round(elapsed, 3),
+        "requests": requests,
+        "requests_per_sec": round(requests / elapsed, 1),
+        "transactions_per_sec": round(len(stats.latency["transaction"]) / elapsed, 1),
+        "rejected": stats.rejected,
+        "failed_sessions": stats.failed,
+        "errors": stats.errors,
+        "latency": {kind: summarize(v) for kind, v in stats.latency.items()},
+    }
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for the wallet / FASTag servers")
+    parser.add_argument("--server", choices=sorted(SERVERS), help="start this server on loopback first")
+    parser.add_argument("--backend", default="json", help="STORE_BACKEND for a started server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--clients", type=int, default=200, help="simulated clients")
+    parser.add_argument("--ops", type=int, default=50, help="CR/DB packets per login")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds over which clients start")
+    parser.add_argument("--credit-ratio", type=float, default=0.5, help="share of CR among transactions")
+    parser.add_argument("--max-amount", type=int, default=100)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="write JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    proc = None
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if args.server:
+                proc = start_server(args.server, args.backend, workdir, args.port)
+            result = asyncio.run(run_load(args.host, args.port, args.clients, args.ops, args.ramp,
+                                          args.credit_ratio, args.max_amount))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "server": args.server or f"{args.host}:{args.port}",
+        "backend": args.backend if args.server else None,
+        "results": result,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
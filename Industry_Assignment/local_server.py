@@ -0,0 +1,49 @@
+"""
+Start server.py (wallet) or sayali/server.py (FASTag) on loopback for benchmarks and demos
+- start_server(name, backend, workdir, port) runs the server in workdir with
+  STORE_BACKEND / SERVER_PORT set and returns the Popen once it answers
+- Refuses a port that is already in use, and gives up as soon as the server exits
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+
+HOST = '127.0.0.1'
+PORT = 5555
+SERVERS = {
+    "wallet": "server.py",
+    "fastag": os.path.join("sayali", "server.py"),
+}
+
+
+def wait_for_port(host, port, proc=None, timeout=10.0):
+    """True once something answers on host:port; False on timeout or if proc exits first
+    (another process may be holding the port)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and (proc is None or proc.poll() is None):
+        try:
+            with socket.create_connection((host, port), timeout=0.2) as s:
+                s.recv(1024)  # take the MAIN_MENU so a sequential server moves on
+                s.sendall(b"X")
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def start_server(name, backend, workdir, port=PORT):
+    with socket.socket() as s:
+        if s.connect_ex((HOST, port)) == 0:
+            raise RuntimeError(f"{HOST}:{port} is already in use")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), SERVERS[name])
+    env = dict(os.environ, STORE_BACKEND=backend, SERVER_PORT=str(port))
+    proc = subprocess.Popen([sys.executable, script], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_for_port(HOST, port, proc) or proc.poll() is not None:
+        proc.kill()
+        proc.wait()
+        raise RuntimeError(f"{name} server did not start on {HOST}:{port}")
+    return proc
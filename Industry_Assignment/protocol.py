@@ -0,0 +1,260 @@
+"""
+Length-prefixed framed protocol for the wallet and FASTag servers
+- Negotiated from the old text handshake: a client answers MAIN_MENU with the
+  exact token '#FRAMED' (instead of E/N/X), the server replies FRAMED and every
+  later message in both directions is a frame. Clients that never send it keep the
+  old protocol; a typo like 'F' or 'FOO' gets INVALID_MENU as before.
+- Frame: length (>I, bytes that follow) | request id (>I) | op count (>H) | ops
+- Request op: instr (2s) | arg (>H), followed by arg bytes of UTF-8 name for LI / RG
+    LI login, RG register (and log in), CR credit, DB debit, LO logout
+    TP toll pass (FASTag server): arg bytes follow = category (1 byte) + vehicle id;
+       consecutive TP ops in a frame are settled together as one batch
+- Reply op: code (2s) | value (>H), the same pair as the 4-byte reply of the old
+  protocol: BA + balance, or ER + 0
+- A reply frame carries the request id of the frame it answers and has one reply
+  op per request op. Frames are answered in order, so clients can pipeline any
+  number of frames without waiting for replies.
+- A frame whose ops don't decode is answered with ER ops under its request id and
+  the session goes on; a bad length prefix gets an ER reply with request id 0 and
+  the connection is closed (the stream can't be resynchronised)
+- Handshake tokens: 'V2' and '#FRAMED' are taken by their exact length, any other
+  menu choice or name up to a newline (or the whole read, as the old clients send
+  it), so a client may pipeline 'V2', '#FRAMED' and its first frames in one write
+- Version 2 (64-bit): a client answers MAIN_MENU with 'V2'; the server switches the
+  session and from then on sends MAIN_MENU_V2 instead of MAIN_MENU. Every 2sH
+  above (4-byte transaction packets, frame ops and reply ops) becomes 2sq:
+  signed 64-bit amounts and balances. Servers that predate v2 answer INVALID_MENU.
+  v1 sessions are unchanged and can't represent a balance above 65535: servers
+  answer ER + 0 for ops on such an account in a v1 session (pack_op never clamps)
+- BufferedReader replaces bare recv() calls on blocking sockets: it keeps leftover
+  bytes between calls and blocks (no spinning) until a whole message is in;
+  AsyncBufferedReader does the same job over an asyncio StreamReader
+"""
+
+import struct
+
+FRAMED_CHOICE = '#FRAMED'   # not something a person types at the menu by accident
+FRAMED_ACK = b"FRAMED"
+V2_CHOICE = 'V2'
+MAIN_MENU = {1: b"MAIN_MENU", 2: b"MAIN_MENU_V2"}
+
+LENGTH = struct.Struct('>I')
+FRAME_HEADER = struct.Struct('>IH')
+OP = struct.Struct('>2sH')
+OP_V2 = struct.Struct('>2sq')
+OPS = {1: OP, 2: OP_V2}   # also the plain transaction packet of each version
+V1_MAX_VALUE = 0xFFFF
+MAX_FRAME = 1 << 20    # frames larger than this are refused
+NAMED_OPS = (b'LI', b'RG')
+TOLL_PASS = b'TP'
+
+
+class FrameError(Exception):
+    """Malformed or oversized frame. body is the frame body when its length was fine."""
+
+    def __init__(self, message, body=None):
+        super().__init__(message)
+        self.body = body
+
+
+class ConnectionClosed(ConnectionError):
+    """Peer closed the connection in the middle of a message."""
+
+
+# ENCODING
+
+def _frame(request_id, body_parts, count):
+    body = FRAME_HEADER.pack(request_id, count) + b''.join(body_parts)
+    return LENGTH.pack(len(body)) + body
+
+
+def pack_op(code, value, version=1):
+    """One 2sH / 2sq pair (struct.error if value doesn't fit the version)."""
+    return OPS[version].pack(code, value)
+
+
+def encode_request(request_id, ops, version=1):
+    """ops: list of (instr, arg); arg is the name (str) for LI / RG, (category, vehicle_id)
+    for TP, else the amount."""
+    OP = OPS[version]
+    parts = []
+    for instr, arg in ops:
+        if instr == TOLL_PASS:
+            category, vehicle_id = arg
+            payload = bytes([int(category)]) + vehicle_id.encode()
+            parts.append(OP.pack(instr, len(payload)) + payload)
+        elif instr in NAMED_OPS:
+            name = arg.encode()
+            parts.append(OP.pack(instr, len(name)) + name)
+        else:
+            parts.append(OP.pack(instr, arg))
+    return _frame(request_id, parts, len(ops))
+
+
+def encode_reply(request_id, results, version=1):
+    """results: list of (code, value) pairs."""
+    return _frame(request_id, [pack_op(code, value, version) for code, value in results], len(results))
+
+
+def decode_request(body, version=1):
+    """Frame body (without the length prefix) -> (request_id, [(instr, arg), ...])."""
+    OP = OPS[version]
+    try:
+        request_id, count = FRAME_HEADER.unpack_from(body)
+        ops = []
+        pos = FRAME_HEADER.size
+        for _ in range(count):
+            instr, arg = OP.unpack_from(body, pos)
+            pos += OP.size
+            if instr in NAMED_OPS or instr == TOLL_PASS:
+                if arg < 0 or pos + arg > len(body):
+                    raise FrameError("name runs past the end of the frame")
+                name = body[pos:pos + arg]
+                pos += arg
+                if instr == TOLL_PASS:
+                    if not name:
+                        raise FrameError("empty toll pass")
+                    arg = (str(name[0]), name[1:].decode())
+                else:
+                    arg = name.decode()
+            ops.append((instr, arg))
+    except (struct.error, UnicodeDecodeError, FrameError) as e:
+        raise FrameError(str(e), body)
+    if pos != len(body):
+        raise FrameError("trailing bytes after the last op", body)
+    return request_id, ops
+
+
+def decode_reply(body, version=1):
+    """Frame body -> (request_id, [(code, value), ...])."""
+    OP = OPS[version]
+    try:
+        request_id, count = FRAME_HEADER.unpack_from(body)
+        results = [OP.unpack_from(body, FRAME_HEADER.size + i * OP.size) for i in range(count)]
+    except struct.error as e:
+        raise FrameError(str(e))
+    return request_id, results
+
+
+def encode_error(error, version=1):
+    """Reply for a FrameError: one ER per op the frame declares (as many as its body
+    could hold), or a single ER under request id 0 when even the length was bad."""
+    if error.body is None or len(error.body) < FRAME_HEADER.size:
+        return encode_reply(0, [(b'ER', 0)], version)
+    request_id, count = FRAME_HEADER.unpack_from(error.body)
+    count = max(1, min(count, (len(error.body) - FRAME_HEADER.size) // OPS[version].size))
+    return encode_reply(request_id, [(b'ER', 0)] * count, version)
+
+
+# HANDSHAKE TOKENS
+
+def _split(data, n):
+    token, rest = data[:n], data[n:]
+    if rest.startswith(b'\r\n'):
+        rest = rest[2:]
+    elif rest.startswith(b'\n'):
+        rest = rest[1:]
+    return token.decode(errors='replace').strip(), rest
+
+
+def split_line(data):
+    """(text up to the first newline, or all of data; the bytes after it)."""
+    end = data.find(b'\n')
+    return _split(data, len(data) if end < 0 else end)
+
+
+def split_choice(data):
+    """Main menu choice: (token, bytes after it). 'V2' and '#FRAMED' are fixed-length
+    so whatever the client sent behind them (a frame, say) is left over, not swallowed."""
+    if data[:2].upper() == V2_CHOICE.encode():
+        return _split(data, len(V2_CHOICE))
+    if data.startswith(FRAMED_CHOICE.encode()):
+        # A frame starts with its length prefix, whose first byte can't be \r or \n
+        return _split(data, len(FRAMED_CHOICE))
+    return split_line(data)
+
+
+def check_length(header):
+    (length,) = LENGTH.unpack(header)
+    if length < FRAME_HEADER.size or length > MAX_FRAME:
+        raise FrameError(f"bad frame length {length}")
+    return length
+
+
+async def read_frame_async(reader):
+    """Read one frame body from an asyncio StreamReader (IncompleteReadError on EOF)."""
+    length = check_length(await reader.readexactly(LENGTH.size))
+    return await reader.readexactly(length)
+
+
+# BUFFERED SOCKET READER
+
+class BufferedReader:
+    """Receive buffer for a blocking socket."""
+
+    def __init__(self, sock, bufsize=65536):
+        self.sock = sock
+        self.bufsize = bufsize
+        self.buffer = bytearray()
+
+    def _fill(self):
+        data = self.sock.recv(self.bufsize)
+        if data:
+            self.buffer += data
+        return len(data)
+
+    def read_some(self, n=1024):
+        """Up to n bytes: whatever is buffered, else one recv(). b'' on EOF (like recv)."""
+        if not self.buffer and not self._fill():
+            return b''
+        data = bytes(self.buffer[:n])
+        del self.buffer[:n]
+        return data
+
+    def read_exactly(self, n):
+        """Exactly n bytes; blocks until they arrive, ConnectionClosed on EOF."""
+        while len(self.buffer) < n:
+            if not self._fill():
+                raise ConnectionClosed(f"connection closed with {len(self.buffer)} of {n} bytes read")
+        data = bytes(self.buffer[:n])
+        del self.buffer[:n]
+        return data
+
+    def read_frame(self):
+        length = check_length(self.read_exactly(LENGTH.size))
+        return self.read_exactly(length)
+
+    def pending(self):
+        """Bytes already received but not consumed."""
+        return len(self.buffer)
+
+    def unread(self, data):
+        """Push data back to be read first."""
+        self.buffer[:0] = data
+
+
+class AsyncBufferedReader:
+    """asyncio StreamReader with unread(), for the text handshake."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.buffer = bytearray()
+
+    async def read(self, n=1024):
+        if not self.buffer:
+            return await self.reader.read(n)
+        data = bytes(self.buffer[:n])
+        del self.buffer[:n]
+        return data
+
+    async def readexactly(self, n):
+        if not self.buffer:
+            return await self.reader.readexactly(n)
+        if len(self.buffer) < n:
+            self.buffer += await self.reader.readexactly(n - len(self.buffer))
+        data = bytes(self.buffer[:n])
+        del self.buffer[:n]
+        return data
+
+    def unread(self, data):
+        self.buffer[:0] = data
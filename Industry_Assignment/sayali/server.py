@@ -1,24 +1,46 @@
 """
 FASTag Server
-- Listens on 127.0.0.1:5555
-- Persistent balances in users.json (vehicle reg -> balance)
+- Listens on 127.0.0.1:5555 (SERVER_PORT overrides the port)
+- Persistent balances (vehicle reg -> balance), STORE_BACKEND selects the store:
+  * json (default): users.json kept current by an append-only transaction log
+    (users.json.log) that is compacted in the background
+  * sqlite: users.db in WAL mode, nothing loaded at startup (seeded from users.json
+    and its transaction log the first time, if present)
 - Protocol:
   * Handshake (text): MAIN_MENU, USERNAME?/NEW_USERNAME?, welcome messages
   * Transactions (binary 4 bytes): struct.pack('>2sH', instr, amount)
     instr: b'CR' (recharge), b'DB' (deduct toll), b'LO' (logout)
     response: b'BA' (balance) or b'ER' (error) + 2-byte value
+  * Framed mode: answer MAIN_MENU with '#FRAMED' to switch to the length-prefixed,
+    pipelined protocol in ../protocol.py
+  * Protocol v2: answer MAIN_MENU with 'V2' for 64-bit amounts and balances
+    (10-byte '>2sq' packets / frame ops); the menu prompt becomes MAIN_MENU_V2.
+    v1 sessions keep the 65535 balance limit; their ops on a vehicle above it get ER
+  * Batch settlement (framed mode, no login needed): a plaza sends a frame of
+    TP (category, vehicle_id) ops; tolls are priced from TOLL_RATES and debited
+    as one batch, with one BA/ER reply per pass
 """
 
 import socket
-import struct
-import json
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from account_store import open_store  # noqa: E402
+from protocol import (BufferedReader, ConnectionClosed, FRAMED_ACK, FRAMED_CHOICE,  # noqa: E402
+                      FrameError, MAIN_MENU, OPS, TOLL_PASS, V2_CHOICE, decode_request,
+                      encode_error, encode_reply, pack_op, split_choice, split_line)
 
 HOST = '127.0.0.1'
-PORT = 5555
-USER_FILE = 'users.json'
-MAX_BALANCE = 65535
+PORT = int(os.environ.get('SERVER_PORT', 5555))
+STORE_BACKEND = os.environ.get('STORE_BACKEND', 'json')  # 'json' or 'sqlite'
+USER_FILE = 'users.db' if STORE_BACKEND == 'sqlite' else 'users.json'
+MAX_BALANCE = (1 << 63) - 1   # protocol v2: signed 64-bit balances
+V1_MAX_BALANCE = 65535        # v1 sessions keep the 16-bit limit
+SESSION_MAX_BALANCE = {1: V1_MAX_BALANCE, 2: MAX_BALANCE}
 INITIAL_BALANCE = 1000  # starting balance for new vehicles
+FLUSH_REPLIES = 256     # framed mode: send buffered replies once this many are waiting
+FLUSH_BYTES = 1 << 16   # ... or once they add up to this many bytes
 
 # Preset toll categories (must match client)
 TOLL_RATES = {
@@ -28,55 +50,139 @@ TOLL_RATES = {
     "4": ("Multi-axle", 400)
 }
 
-# Load or initialize users data
-if os.path.exists(USER_FILE):
-    with open(USER_FILE, 'r') as f:
-        users = json.load(f)
-else:
-    users = {}
+# Vehicle balances: JSON snapshot + transaction log, or an SQLite database (opened in main)
+users = None
+
+def durable():
+    """Block until every change so far is on disk; called before each reply so nothing
+    acknowledged to a client can be lost in a crash."""
+    users.wait_durable(users.last_ticket())
 
-def save_users():
-    """Persist users dict to JSON file."""
-    with open(USER_FILE, 'w') as f:
-        json.dump(users, f)
+def visible_balance(vehicle_id, max_balance):
+    """The vehicle's balance, or None if it is missing or above what the session can show
+    (a v1 session is refused accounts that grew past 65535 in v2 rather than lied to)."""
+    bal = users.get_balance(vehicle_id)
+    return bal if bal is not None and bal <= max_balance else None
 
-def process_instruction(vehicle_id, instr, amount):
+def process_instruction(vehicle_id, instr, amount, max_balance=MAX_BALANCE):
     """Apply CR/DB for vehicle_id. Return (code_bytes, value_int)."""
-    balance = users[vehicle_id]
-    if instr == b'CR':  # Recharge
-        if balance + amount <= MAX_BALANCE:
-            balance += amount
-            users[vehicle_id] = balance
-            return b'BA', balance
-        else:
-            return b'ER', 0
-    elif instr == b'DB':  # Toll deduction
-        if balance >= amount:
-            balance -= amount
-            users[vehicle_id] = balance
-            return b'BA', balance
-        else:
-            return b'ER', 0
+    if max_balance < MAX_BALANCE and visible_balance(vehicle_id, max_balance) is None:
+        return b'ER', 0
+    if instr == b'CR' and amount >= 0:  # Recharge
+        balance = users.credit(vehicle_id, amount, max_balance)
+    elif instr == b'DB' and amount >= 0:  # Toll deduction
+        balance = users.debit(vehicle_id, amount)
     else:
+        balance = None
+    if balance is None:
         return b'ER', 0
+    return b'BA', balance
+
+def settle_passes(passes, max_balance=MAX_BALANCE):
+    """Charge a block of (category, vehicle_id) toll passes in one store transaction.
+    Returns (code, balance) per pass; unknown categories / vehicles, short balances and
+    (in v1 sessions) balances above max_balance get ER and are not charged."""
+    items = []
+    priced = []
+    for category, vehicle_id in passes:
+        rate = TOLL_RATES.get(category)
+        if max_balance < MAX_BALANCE and visible_balance(vehicle_id, max_balance) is None:
+            rate = None
+        priced.append(rate is not None)
+        if rate is not None:
+            items.append((vehicle_id, rate[1]))
+    balances = iter(users.debit_many(items))
+    results = []
+    for ok in priced:
+        balance = next(balances) if ok else None
+        results.append((b'ER', 0) if balance is None else (b'BA', balance))
+    return results
+
+def serve_frames(conn, reader, version=1):
+    """Framed session: apply each frame's ops in order and send one reply frame per frame.
+    Replies for frames that are already buffered go out in one sendall (at most
+    FLUSH_REPLIES / FLUSH_BYTES at a time, so a client that keeps sending still gets them)."""
+    vehicle_id = None
+    max_balance = SESSION_MAX_BALANCE[version]
+    out = []
+    out_bytes = 0
+
+    def send_replies():
+        nonlocal out, out_bytes
+        durable()  # one fsync covers every buffered reply
+        conn.sendall(b''.join(out))
+        out, out_bytes = [], 0
+
+    while True:
+        try:
+            request_id, ops = decode_request(reader.read_frame(), version)
+        except FrameError as e:
+            out.append(encode_error(e, version))
+            send_replies()
+            if e.body is None:
+                raise  # bad length prefix: can't find the next frame
+            continue
+        results = []
+        passes = []
+        for instr, arg in ops:
+            if instr == TOLL_PASS:
+                passes.append(arg)
+                continue
+            if passes:
+                results.extend(settle_passes(passes, max_balance))
+                passes = []
+            if instr == b'LI':
+                bal = visible_balance(arg, max_balance)
+                vehicle_id = arg if bal is not None else None
+                results.append((b'BA', bal) if bal is not None else (b'ER', 0))
+            elif instr == b'RG':
+                created = users.create(arg, INITIAL_BALANCE)
+                vehicle_id = arg if created else None
+                results.append((b'BA', INITIAL_BALANCE) if created else (b'ER', 0))
+            elif instr == b'LO':
+                vehicle_id = None
+                results.append((b'BA', 0))
+            elif vehicle_id is None:
+                results.append((b'ER', 0))
+            else:
+                results.append(process_instruction(vehicle_id, instr, arg, max_balance))
+        if passes:
+            results.extend(settle_passes(passes, max_balance))
+        out.append(encode_reply(request_id, results, version))
+        out_bytes += len(out[-1])
+        if not reader.pending() or len(out) >= FLUSH_REPLIES or out_bytes >= FLUSH_BYTES:
+            send_replies()
 
 def handle_client(conn, addr):
     """Handle a single client connection (sequential server)."""
     print(f"[+] Connected by {addr}")
+    reader = BufferedReader(conn)
+    version = 1
     try:
         while True:
             # Prompt client to show main menu
-            conn.sendall(b"MAIN_MENU")
-            choice_bytes = conn.recv(1024)
+            conn.sendall(MAIN_MENU[version])
+            choice_bytes = reader.read_some(1024)
             if not choice_bytes:
                 # client disconnected
                 print(f"[-] Client {addr} disconnected during main menu")
                 break
-            main_choice = choice_bytes.decode().strip().upper()
+            main_choice, rest = split_choice(choice_bytes)
+            reader.unread(rest)  # e.g. a frame pipelined behind '#FRAMED'
+            main_choice = main_choice.upper()
             if main_choice == 'X':
                 conn.sendall(b"EXIT")
                 print(f"[+] Client {addr} requested exit")
                 break
+            if main_choice == V2_CHOICE:
+                version = 2
+                print(f"[+] Client {addr} switched to protocol v2")
+                continue
+            if main_choice == FRAMED_CHOICE:
+                conn.sendall(FRAMED_ACK)
+                print(f"[+] Client {addr} switched to framed protocol")
+                serve_frames(conn, reader, version)
+                return
             if main_choice not in ('E', 'N'):
                 conn.sendall(b"INVALID_MENU")
                 continue
@@ -85,36 +191,35 @@ def handle_client(conn, addr):
             while True:
                 prompt = b"USERNAME?" if main_choice == 'E' else b"NEW_USERNAME?"
                 conn.sendall(prompt)
-                uname_bytes = conn.recv(1024)
+                uname_bytes = reader.read_some(1024)
                 if not uname_bytes:
                     # client disconnected
                     print(f"[-] Client {addr} disconnected during username prompt")
                     return
-                vehicle_id = uname_bytes.decode().strip()
+                vehicle_id, rest = split_line(uname_bytes)
+                reader.unread(rest)
                 if main_choice == 'E':
-                    if vehicle_id in users:
-                        bal = users[vehicle_id]
+                    bal = users.get_balance(vehicle_id)
+                    if bal is not None:
                         conn.sendall(f"Welcome back, {vehicle_id}! Balance: {bal} coins (₹{bal})\n".encode())
                         break
                     else:
                         conn.sendall(b"User not found. Try again.")
                 else:  # new registration
-                    if vehicle_id in users:
+                    if not users.create(vehicle_id, INITIAL_BALANCE):
                         conn.sendall(b"Username exists. Try another.")
                     else:
-                        users[vehicle_id] = INITIAL_BALANCE
-                        save_users()
-                        bal = users[vehicle_id]
+                        bal = INITIAL_BALANCE
+                        durable()
                         conn.sendall(f"Account created! Vehicle {vehicle_id} registered. Balance: {bal} coins (₹{bal})\n".encode())
                         break
 
-            # Transaction loop (expect binary 4-byte messages)
+            # Transaction loop (binary packets: 4 bytes in v1, 10 bytes in v2)
+            packet = OPS[version]
+            max_balance = SESSION_MAX_BALANCE[version]
             while True:
-                data = conn.recv(4)
-                if not data or len(data) != 4:
-                    # ignore and wait for proper 4-byte packet
-                    continue
-                instr, amount = struct.unpack('>2sH', data)
+                data = reader.read_exactly(packet.size)  # blocks until a whole packet is in
+                instr, amount = packet.unpack(data)
 
                 # Logout special signal
                 if instr == b'LO':
@@ -122,18 +227,20 @@ def handle_client(conn, addr):
                     break
 
                 # Process CR / DB
-                code, new_balance = process_instruction(vehicle_id, instr, amount)
-                # send response
-                conn.sendall(struct.pack('>2sH', code, new_balance))
+                code, new_balance = process_instruction(vehicle_id, instr, amount, max_balance)
+                # send response once the change is on disk
+                durable()
+                conn.sendall(pack_op(code, new_balance, version))
                 if code == b'BA':
                     print(f"[TX] {vehicle_id}: {instr.decode()} {amount} => New balance ₹{new_balance}")
                 else:
-                    print(f"[TX] {vehicle_id}: {instr.decode()} {amount} => FAILED (Balance ₹{users[vehicle_id]})")
+                    print(f"[TX] {vehicle_id}: {instr.decode()} {amount} => FAILED (Balance ₹{users.get_balance(vehicle_id)})")
 
+    except ConnectionClosed:
+        print(f"[-] Client {addr} disconnected")
     except Exception as ex:
         print(f"[!] Error with client {addr}: {ex}")
     finally:
-        save_users()
         try:
             conn.close()
         except Exception:
@@ -141,7 +248,10 @@ def handle_client(conn, addr):
         print(f"[-] Connection with {addr} closed")
 
 def main():
+    global users
+    users = open_store(STORE_BACKEND, USER_FILE)
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  # restart without waiting out TIME_WAIT
         s.bind((HOST, PORT))
         s.listen()
         print(f"FASTag Server running on {HOST}:{PORT}")
@@ -150,4 +260,10 @@ def main():
             handle_client(conn, addr)
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if users is not None:
+            users.close()
@@ -1,21 +1,26 @@
-import socket
-import struct
-import json
+import asyncio
 import os
 import random
 import string
 
+from account_store import open_store
+from protocol import (AsyncBufferedReader, FRAMED_ACK, FRAMED_CHOICE, FrameError, MAIN_MENU, OPS,
+                      V2_CHOICE, decode_request, encode_error, encode_reply, pack_op,
+                      read_frame_async, split_choice, split_line)
+
 HOST = '127.0.0.1'
-PORT = 5555
-MAX_BALANCE = 65535
-PLAYER_FILE = 'players.json'
+PORT = int(os.environ.get('SERVER_PORT', 5555))
+MAX_BALANCE = (1 << 63) - 1   # protocol v2: signed 64-bit balances
+V1_MAX_BALANCE = 65535        # v1 sessions keep the 16-bit limit
+SESSION_MAX_BALANCE = {1: V1_MAX_BALANCE, 2: MAX_BALANCE}
+STORE_BACKEND = os.environ.get('STORE_BACKEND', 'json')  # 'json' or 'sqlite'
+PLAYER_FILE = 'players.db' if STORE_BACKEND == 'sqlite' else 'players.json'
+MAX_CLIENTS = 10000  # connections served at once; extra clients wait for a slot
+INITIAL_BALANCE = 1000
+MAX_QUEUED_REPLIES = 1024  # framed mode: replies waiting for a group commit per connection
 
-# Load or initialize players
-if os.path.exists(PLAYER_FILE):
-    with open(PLAYER_FILE, 'r') as f:
-        players = json.load(f)
-else:
-    players = {}
+# Player balances: JSON snapshot + transaction log, or an SQLite database (opened in main)
+players = None
 
 SHOP_ITEMS = {
     "Health Potion": 200,
@@ -28,112 +33,225 @@ def generate_captcha(length=5):
     """Generate a random alphanumeric captcha."""
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
 
-def save_players():
-    with open(PLAYER_FILE, 'w') as f:
-        json.dump(players, f)
-
-def process_instruction(username, instr, amount):
-    balance = players[username]
-    if instr == b'CR':
-        if balance + amount <= MAX_BALANCE:
-            balance += amount
-            players[username] = balance
-            return b'BA', balance
-        else:
-            return b'ER', 0
-    elif instr == b'DB':
-        if balance >= amount:
-            balance -= amount
-            players[username] = balance
-            return b'BA', balance
-        else:
-            return b'ER', 0
+def visible_balance(account, max_balance):
+    """The account's balance, or None if it is missing or above what the session can show
+    (a v1 session is refused accounts that grew past 65535 in v2 rather than lied to)."""
+    balance = players.get_balance(account)
+    return balance if balance is not None and balance <= max_balance else None
+
+def process_instruction(username, instr, amount, max_balance=MAX_BALANCE):
+    # Runs to completion on the event loop thread with no await inside, so the
+    # balance check and the update can't interleave with another session: no lock needed
+    if max_balance < MAX_BALANCE and visible_balance(username, max_balance) is None:
+        return b'ER', 0
+    if instr == b'CR' and amount >= 0:
+        balance = players.credit(username, amount, max_balance)
+    elif instr == b'DB' and amount >= 0:
+        balance = players.debit(username, amount)
     else:
+        balance = None
+    if balance is None:
         return b'ER', 0
+    return b'BA', balance
 
-with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-    s.bind((HOST, PORT))
-    s.listen()
-    print(f"Gaming Coin Wallet Server running on {HOST}:{PORT}")
+async def durable():
+    """Wait for the group commit covering every change so far; replies are sent only
+    after it, so nothing acknowledged to a client can be lost in a crash."""
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def wake():  # runs on the journal's flusher thread
+        try:
+            loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+        except RuntimeError:
+            pass  # event loop already shut down
+
+    if players.when_durable(players.last_ticket(), wake):
+        await done
 
+async def send(writer, data):
+    writer.write(data)
+    await writer.drain()
+
+async def recv_text(reader, split=split_line):
+    """One handshake token; anything the client sent after it stays in the reader."""
+    text, rest = split(await reader.read(1024))
+    reader.unread(rest)
+    return text
+
+async def send_durably(writer, replies):
+    """Write queued reply frames once the group commit covering them is done; frames
+    answered during one fsync go out together after the next. None ends the queue."""
     while True:
-        conn, addr = s.accept()
-        with conn:
-            print(f"Connected by {addr}")
+        batch = [await replies.get()]
+        while not replies.empty():
+            batch.append(replies.get_nowait())
+        await durable()
+        done = batch[-1] is None
+        writer.write(b''.join(batch[:-1] if done else batch))
+        await writer.drain()
+        if done:
+            return
+
+async def serve_frames(reader, writer, version=1):
+    """Framed session (protocol.py): apply each frame's ops in order, one reply frame each.
+    Frames keep being applied while earlier replies wait for their group commit."""
+    username = None
+    max_balance = SESSION_MAX_BALANCE[version]
+    replies = asyncio.Queue(MAX_QUEUED_REPLIES)
+    sender = asyncio.create_task(send_durably(writer, replies))
+    session = asyncio.current_task()
+    sender.add_done_callback(lambda t: t.cancelled() or t.exception() is None or session.cancel())
+    try:
+        while True:
             try:
-                while True:  # Main menu loop
-                    conn.sendall(b"MAIN_MENU")
-                    main_choice = conn.recv(1024).decode().strip().upper()
-                    if not main_choice or main_choice == 'X':
-                        conn.sendall(b"EXIT")
-                        print(f"Client {addr} exited.")
+                request_id, ops = decode_request(await read_frame_async(reader), version)
+            except FrameError as e:
+                await replies.put(encode_error(e, version))
+                if e.body is None:
+                    raise  # bad length prefix: can't find the next frame
+                continue
+            results = []
+            for instr, arg in ops:
+                if instr == b'LI':
+                    balance = visible_balance(arg, max_balance)
+                    username = arg if balance is not None else None
+                    results.append((b'BA', balance) if balance is not None else (b'ER', 0))
+                elif instr == b'RG':
+                    created = players.create(arg, INITIAL_BALANCE)
+                    username = arg if created else None
+                    results.append((b'BA', INITIAL_BALANCE) if created else (b'ER', 0))
+                elif instr == b'LO':
+                    username = None
+                    results.append((b'BA', 0))
+                elif username is None:
+                    results.append((b'ER', 0))
+                else:
+                    results.append(process_instruction(username, instr, arg, max_balance))
+            await replies.put(encode_reply(request_id, results, version))
+    finally:
+        if not sender.done():
+            await replies.put(None)  # send what is queued before the connection closes
+            await sender
+
+async def handle_client(reader, writer):
+    addr = writer.get_extra_info('peername')
+    print(f"Connected by {addr}")
+    reader = AsyncBufferedReader(reader)
+    version = 1
+    try:
+        while True:  # Main menu loop
+            await send(writer, MAIN_MENU[version])
+            main_choice = (await recv_text(reader, split_choice)).upper()
+            if not main_choice or main_choice == 'X':
+                await send(writer, b"EXIT")
+                print(f"Client {addr} exited.")
+                break
+
+            if main_choice == V2_CHOICE:
+                version = 2
+                print(f"Client {addr} switched to protocol v2.")
+                continue
+
+            if main_choice == FRAMED_CHOICE:
+                await send(writer, FRAMED_ACK)
+                print(f"Client {addr} switched to framed protocol.")
+                await serve_frames(reader, writer, version)
+                return
+
+            if main_choice not in ['E', 'N']:
+                await send(writer, b"INVALID_MENU")
+                continue
+
+            # Username handling
+            while True:
+                prompt = b"USERNAME?" if main_choice == 'E' else b"NEW_USERNAME?"
+                await send(writer, prompt)
+                username = await recv_text(reader)
+                if not username:
+                    print(f"Client {addr} disconnected during username prompt")
+                    return
+                if main_choice == 'E':
+                    balance = players.get_balance(username)
+                    if balance is not None:
+                        await send(writer, f"Welcome back, {username}! Balance: {balance} coins\n".encode())
+                        break
+                    else:
+                        await send(writer, b"User not found. Try again.")
+                else:
+                    if players.create(username, INITIAL_BALANCE):
+                        await durable()
+                        await send(writer, f"Account created! Welcome, {username}! Balance: {INITIAL_BALANCE} coins\n".encode())
                         break
+                    else:
+                        await send(writer, b"Username exists. Try another.")
+
+            # Transaction loop
+            packet = OPS[version]
+            max_balance = SESSION_MAX_BALANCE[version]
+            while True:
+                data = await reader.readexactly(packet.size)
+                instr, amount = packet.unpack(data)
+
+                # Handle captcha request
+                if instr == b'CP':
+                    captcha = generate_captcha()
+                    await send(writer, f"CAPTCHA:{captcha}".encode())
+
+                    # Receive captcha answer
+                    answer = await recv_text(reader)
+                    if answer.upper() == captcha.upper():
+                        # Award random coins between 100 and 500
+                        reward = random.randint(100, 500)
+                        code, new_balance = process_instruction(username, b'CR', reward, max_balance)
+                        await durable()
+                        await send(writer, pack_op(code, new_balance, version))
+                        print(f"{username} passed captcha and earned {reward} coins. New Balance: {new_balance}")
+                    else:
+                        await send(writer, pack_op(b'ER', 0, version))
+                        print(f"{username} failed captcha. No reward given.")
+                    continue
+
+                # Handle logout
+                if instr == b'LO':
+                    print(f"{username} logged out.")
+                    break
+
+                # Handle credit/debit transactions
+                code, new_balance = process_instruction(username, instr, amount, max_balance)
+                await durable()
+                await send(writer, pack_op(code, new_balance, version))
+                if code == b'BA':
+                    print(f"{username}: Transaction successful. New Balance: {new_balance}")
+                else:
+                    print(f"{username}: Transaction failed. Balance: {players.get_balance(username)}")
+    except asyncio.IncompleteReadError:
+        print(f"Client {addr} disconnected.")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        writer.close()
+        print(f"Connection with {addr} closed.")
+
+async def main():
+    global players
+    players = open_store(STORE_BACKEND, PLAYER_FILE)
+    slots = asyncio.Semaphore(MAX_CLIENTS)
+
+    async def serve(reader, writer):
+        async with slots:
+            await handle_client(reader, writer)
+
+    server = await asyncio.start_server(serve, HOST, PORT)
+    print(f"Gaming Coin Wallet Server running on {HOST}:{PORT}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        players.close()
 
-                    if main_choice not in ['E', 'N']:
-                        conn.sendall(b"INVALID_MENU")
-                        continue
-
-                    # Username handling
-                    while True:
-                        prompt = b"USERNAME?" if main_choice == 'E' else b"NEW_USERNAME?"
-                        conn.sendall(prompt)
-                        username = conn.recv(1024).decode().strip()
-                        if main_choice == 'E':
-                            if username in players:
-                                balance = players[username]
-                                conn.sendall(f"Welcome back, {username}! Balance: {balance} coins\n".encode())
-                                break
-                            else:
-                                conn.sendall(b"User not found. Try again.")
-                        else:
-                            if username not in players:
-                                players[username] = 1000
-                                save_players()
-                                conn.sendall(f"Account created! Welcome, {username}! Balance: 1000 coins\n".encode())
-                                break
-                            else:
-                                conn.sendall(b"Username exists. Try another.")
-
-                    # Transaction loop
-                    while True:
-                        data = conn.recv(4)
-                        if not data or len(data) != 4:
-                            continue
-                        instr, amount = struct.unpack('>2sH', data)
-
-                        # Handle captcha request
-                        if instr == b'CP':
-                            captcha = generate_captcha()
-                            conn.sendall(f"CAPTCHA:{captcha}".encode())
-
-                            # Receive captcha answer
-                            answer = conn.recv(1024).decode().strip()
-                            if answer.upper() == captcha.upper():
-                                # Award random coins between 100 and 500
-                                reward = random.randint(100, 500)
-                                code, new_balance = process_instruction(username, b'CR', reward)
-                                conn.sendall(struct.pack('>2sH', code, new_balance))
-                                print(f"{username} passed captcha and earned {reward} coins. New Balance: {new_balance}")
-                            else:
-                                conn.sendall(struct.pack('>2sH', b'ER', 0))
-                                print(f"{username} failed captcha. No reward given.")
-                            continue
-
-                        # Handle logout
-                        if instr == b'LO':
-                            print(f"{username} logged out.")
-                            break
-
-                        # Handle credit/debit transactions
-                        code, new_balance = process_instruction(username, instr, amount)
-                        conn.sendall(struct.pack('>2sH', code, new_balance))
-                        if code == b'BA':
-                            print(f"{username}: Transaction successful. New Balance: {new_balance}")
-                        else:
-                            print(f"{username}: Transaction failed. Balance: {players[username]}")
-            except Exception as e:
-                print(f"Error: {e}")
-            finally:
-                save_players()
-                conn.close()
-                print(f"Connection with {addr} closed.")
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
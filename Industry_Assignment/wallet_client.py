@@ -0,0 +1,539 @@
+"""
+Scriptable client library for server.py (wallet) and sayali/server.py (FASTag)
+- Speaks the framed protocol (protocol.py): the handshake asks for protocol v2
+  (64-bit balances) and falls back to v1 on servers that answer INVALID_MENU
+- Typed calls: login, register, credit, debit, logout; they return the balance
+  and raise on an ER reply (AccountNotFound / AccountExists / TransactionRejected)
+- Every credit/debit frame carries its own LI op, so a connection can serve any
+  account and frames can be pipelined without waiting for replies
+- WalletConnection (blocking) and AsyncWalletConnection (asyncio): one kept-alive
+  connection; pipeline(requests) sends a whole list of requests ahead of the replies
+- WalletClient: a thread-safe pool of blocking connections; pipeline() puts every
+  request for an account on the same connection, so they are applied in order
+- AsyncWalletClient: pool_size connections; an account always uses the same one
+- sayali/server.py serves one connection at a time, so use pool_size=1 with it
+- A reply that doesn't fit its request (wrong id or op count) raises ProtocolError;
+  the connection is out of step and is closed, never reused
+
+Usage: python wallet_client.py [--server wallet|fastag] [--requests 20000] [--pool 4]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from local_server import start_server
+from protocol import (BufferedReader, FRAMED_ACK, FRAMED_CHOICE, MAIN_MENU, V2_CHOICE,
+                      decode_reply, encode_request, read_frame_async)
+
+HOST = '127.0.0.1'
+PORT = 5555
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_POOL_SIZE = 4
+DEFAULT_WINDOW = 512   # frames in flight per connection in the blocking pipeline
+
+
+class WalletError(Exception):
+    """The server answered ER."""
+
+
+class ProtocolError(ConnectionError):
+    """The server's reply doesn't match the request; the connection can't be trusted."""
+
+
+class AccountNotFound(WalletError):
+    pass
+
+
+class AccountExists(WalletError):
+    pass
+
+
+class TransactionRejected(WalletError):
+    """Insufficient balance for a debit, or a credit over the balance limit."""
+
+
+# REQUESTS
+# A request is a tuple: ('login', account), ('register', account),
+# ('credit', account, amount), ('debit', account, amount) or ('logout',)
+
+def _ops(kind, account=None, amount=0):
+    if kind == 'login':
+        return [(b'LI', account)]
+    if kind == 'register':
+        return [(b'RG', account)]
+    if kind in ('credit', 'debit'):
+        if amount < 0:
+            raise ValueError("amount must not be negative")
+        return [(b'LI', account), (b'CR' if kind == 'credit' else b'DB', amount)]
+    if kind == 'logout':
+        return [(b'LO', 0)]
+    raise ValueError(f"Unknown request kind: {kind}")
+
+
+def _outcome(kind, account, replies):
+    """Reply ops -> balance (None for logout), or raise the matching WalletError."""
+    if len(replies) != (2 if kind in ('credit', 'debit') else 1):
+        raise ProtocolError(f"{len(replies)} reply ops for a {kind} request")
+    if kind in ('credit', 'debit'):
+        (login_code, _), (code, balance) = replies
+        if login_code != b'BA':
+            raise AccountNotFound(account)
+        if code != b'BA':
+            raise TransactionRejected(f"{kind} refused for {account}")
+        return balance
+    code, balance = replies[0]
+    if code != b'BA':
+        raise (AccountExists if kind == 'register' else AccountNotFound)(account)
+    return None if kind == 'logout' else balance
+
+
+def _settle(request, replies):
+    """_outcome for pipelines: exceptions are returned in place of the balance."""
+    try:
+        return _outcome(request[0], request[1] if len(request) > 1 else None, replies)
+    except WalletError as e:
+        return e
+
+
+def _menu_version(data):
+    if data.endswith(MAIN_MENU[2]):
+        return 2
+    if data.endswith(MAIN_MENU[1]):
+        return 1
+    return None
+
+
+# BLOCKING CLIENT
+
+class WalletConnection:
+    """One blocking framed connection; use as `with WalletConnection() as conn:`."""
+
+    def __init__(self, host=HOST, port=PORT, timeout=DEFAULT_TIMEOUT, version=2):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.version = version
+        self.sock = None
+        self.reader = None
+        self._ids = itertools.count(1)
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = BufferedReader(self.sock)
+        self._read_menu()
+        if self.version == 2:
+            self.sock.sendall(V2_CHOICE.encode())
+            self.version = self._read_menu()
+        self.sock.sendall(FRAMED_CHOICE.encode())
+        if self.reader.read_exactly(len(FRAMED_ACK)) != FRAMED_ACK:
+            raise ProtocolError("server does not support the framed protocol")
+        return self
+
+    def _read_menu(self):
+        data = b''
+        while _menu_version(data) is None:
+            chunk = self.reader.read_some(1024)
+            if not chunk:
+                raise ConnectionError("server closed the connection during the handshake")
+            data += chunk
+        return _menu_version(data)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request_id(self):
+        return next(self._ids) & 0xFFFFFFFF
+
+    def _read_reply(self, request_id):
+        reply_id, replies = decode_reply(self.reader.read_frame(), self.version)
+        if reply_id != request_id:
+            raise ProtocolError(f"reply {reply_id} does not match request {request_id}")
+        return replies
+
+    def call(self, kind, account=None, amount=0):
+        if self.sock is None:
+            self.connect()
+        request_id = self._request_id()
+        self.sock.sendall(encode_request(request_id, _ops(kind, account, amount), self.version))
+        return _outcome(kind, account, self._read_reply(request_id))
+
+    def login(self, account):
+        return self.call('login', account)
+
+    def register(self, account):
+        return self.call('register', account)
+
+    def credit(self, account, amount):
+        return self.call('credit', account, amount)
+
+    def debit(self, account, amount):
+        return self.call('debit', account, amount)
+
+    def logout(self):
+        return self.call('logout')
+
+    def pipeline(self, requests, window=DEFAULT_WINDOW):
+        """Send requests `window` frames at a time without waiting for each reply.
+        Returns one result per request: the balance, or the WalletError it raised."""
+        if self.sock is None:
+            self.connect()
+        results = []
+        for start in range(0, len(requests), window):
+            chunk = requests[start:start + window]
+            ids = [self._request_id() for _ in chunk]
+            self.sock.sendall(b''.join(encode_request(i, _ops(*r), self.version) for i, r in zip(ids, chunk)))
+            results.extend(_settle(r, self._read_reply(i)) for i, r in zip(ids, chunk))
+        return results
+
+
+class WalletClient:
+    """Thread-safe pool of up to pool_size WalletConnections."""
+
+    def __init__(self, host=HOST, port=PORT, pool_size=DEFAULT_POOL_SIZE, **options):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.options = options
+        self._idle = []        # connections ready for use, most recent last
+        self._open = 0         # connections open or being opened
+        self._slots = threading.Condition()
+
+    def _checkout(self):
+        """An idle connection, or a new one while fewer than pool_size are open; otherwise
+        wait until one is checked in or a slot is freed."""
+        with self._slots:
+            while not self._idle and self._open >= self.pool_size:
+                self._slots.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        try:
+            return WalletConnection(self.host, self.port, **self.options).connect()
+        except Exception:
+            self._free_slot()
+            raise
+
+    def _checkin(self, conn):
+        with self._slots:
+            self._idle.append(conn)
+            self._slots.notify()
+
+    def _free_slot(self):
+        with self._slots:
+            self._open -= 1
+            self._slots.notify()
+
+    def _run(self, method, *args):
+        conn = self._checkout()
+        try:
+            result = getattr(conn, method)(*args)
+        except WalletError:
+            self._checkin(conn)   # refused request; the connection is still fine
+            raise
+        except Exception:  # ProtocolError, socket errors: drop the connection
+            conn.close()
+            self._free_slot()
+            raise
+        self._checkin(conn)
+        return result
+
+    def login(self, account):
+        return self._run('login', account)
+
+    def register(self, account):
+        return self._run('register', account)
+
+    def credit(self, account, amount):
+        return self._run('credit', account, amount)
+
+    def debit(self, account, amount):
+        return self._run('debit', account, amount)
+
+    def logout(self):
+        return self._run('logout')
+
+    def pipeline(self, requests, window=DEFAULT_WINDOW):
+        """Split requests into pool_size shares by account and pipeline each share on its own
+        connection, so requests for one account keep their order."""
+        shares = [[] for _ in range(self.pool_size)]
+        for index, request in enumerate(requests):
+            account = request[1] if len(request) > 1 else ''
+            shares[hash(account) % self.pool_size].append((index, request))
+        shares = [s for s in shares if s]
+        results = [None] * len(requests)
+        with ThreadPoolExecutor(len(shares) or 1) as pool:
+            done = pool.map(lambda share: self._run('pipeline', [r for _, r in share], window), shares)
+            for share, share_results in zip(shares, done):
+                for (index, _), result in zip(share, share_results):
+                    results[index] = result
+        return results
+
+    def close(self):
+        with self._slots:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._slots.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ASYNCIO CLIENT
+
+class AsyncWalletConnection:
+    """One framed connection shared by any number of coroutines; replies are matched
+    to their request by id, so concurrent calls are pipelined automatically."""
+
+    def __init__(self, host=HOST, port=PORT, timeout=DEFAULT_TIMEOUT, version=2):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.version = version
+        self.reader = None
+        self.writer = None
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._pending = {}
+        self._read_task = None
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self):
+        """Open the connection and do the handshake. reader / writer are only set once
+        the server has acknowledged framed mode, so a half-open connection is never used."""
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout)
+        try:
+            await self._read_menu(reader)
+            version = self.version
+            if version == 2:
+                writer.write(V2_CHOICE.encode())
+                version = await self._read_menu(reader)
+            writer.write(FRAMED_CHOICE.encode())
+            ack = await asyncio.wait_for(reader.readexactly(len(FRAMED_ACK)), self.timeout)
+            if ack != FRAMED_ACK:
+                raise ProtocolError("server does not support the framed protocol")
+        except BaseException:
+            writer.close()
+            raise
+        self.reader, self.writer, self.version = reader, writer, version
+        self._read_task = asyncio.create_task(self._read_loop())
+        return self
+
+    async def ensure_connected(self):
+        """connect() unless connected; concurrent callers share one handshake."""
+        if self.writer is None:
+            async with self._connect_lock:
+                if self.writer is None:
+                    await self.connect()
+        return self
+
+    async def _read_menu(self, reader):
+        data = b''
+        while _menu_version(data) is None:
+            chunk = await asyncio.wait_for(reader.read(1024), self.timeout)
+            if not chunk:
+                raise ConnectionError("server closed the connection during the handshake")
+            data += chunk
+        return _menu_version(data)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                reply_id, replies = decode_reply(await read_frame_async(self.reader), self.version)
+                fut = self._pending.pop(reply_id, None)
+                if fut is None and reply_id > self._last_id:
+                    raise ProtocolError(f"reply {reply_id} for a request never sent")
+                if fut is not None and not fut.done():  # no future: the caller timed out
+                    fut.set_result(replies)
+        except Exception as e:
+            error = e if isinstance(e, ConnectionError) else ConnectionError(f"connection lost: {e!r}")
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(error)
+            self._pending.clear()
+            if self.writer is not None:  # out of step or gone: the next call reconnects
+                self.writer.close()
+                self.writer = None
+                self._read_task = None
+
+    async def close(self):
+        if self._read_task is not None:
+            self._read_task.cancel()
+            self._read_task = None
+        for fut in self._pending.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError("connection closed"))
+        self._pending.clear()
+        if self.writer is not None:
+            writer, self.writer = self.writer, None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass  # already reset by the peer
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def call(self, kind, account=None, amount=0):
+        await self.ensure_connected()
+        request_id = self._last_id = next(self._ids) & 0xFFFFFFFF
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = fut
+        self.writer.write(encode_request(request_id, _ops(kind, account, amount), self.version))
+        await self.writer.drain()
+        try:
+            replies = await asyncio.wait_for(fut, self.timeout)
+        finally:
+            self._pending.pop(request_id, None)
+        try:
+            return _outcome(kind, account, replies)
+        except ProtocolError:
+            await self.close()  # the next call reconnects
+            raise
+
+    async def login(self, account):
+        return await self.call('login', account)
+
+    async def register(self, account):
+        return await self.call('register', account)
+
+    async def credit(self, account, amount):
+        return await self.call('credit', account, amount)
+
+    async def debit(self, account, amount):
+        return await self.call('debit', account, amount)
+
+    async def logout(self):
+        return await self.call('logout')
+
+    async def pipeline(self, requests):
+        """Issue all requests at once. Returns results in order; a refused request
+        yields its WalletError instead of a balance."""
+        return await asyncio.gather(*(self.call(*r) for r in requests), return_exceptions=True)
+
+
+class AsyncWalletClient:
+    """pool_size AsyncWalletConnections, opened on first use; an account always maps
+    to the same connection."""
+
+    def __init__(self, host=HOST, port=PORT, pool_size=DEFAULT_POOL_SIZE, **options):
+        self.connections = [AsyncWalletConnection(host, port, **options) for _ in range(pool_size)]
+
+    async def _connection(self, account):
+        conn = self.connections[hash(account or '') % len(self.connections)]
+        return await conn.ensure_connected()
+
+    async def call(self, kind, account=None, amount=0):
+        return await (await self._connection(account)).call(kind, account, amount)
+
+    async def login(self, account):
+        return await self.call('login', account)
+
+    async def register(self, account):
+        return await self.call('register', account)
+
+    async def credit(self, account, amount):
+        return await self.call('credit', account, amount)
+
+    async def debit(self, account, amount):
+        return await self.call('debit', account, amount)
+
+    async def logout(self):
+        return await self.call('logout')
+
+    async def pipeline(self, requests):
+        return await asyncio.gather(*(self.call(*r) for r in requests), return_exceptions=True)
+
+    async def close(self):
+        for conn in self.connections:
+            await conn.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+# MAIN PROGRAM
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wallet / FASTag client library demo")
+    parser.add_argument("--server", choices=["wallet", "fastag"], help="start this server on loopback first")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--requests", type=int, default=20000, help="pipelined requests per client")
+    parser.add_argument("--pool", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--accounts", type=int, default=50)
+    args = parser.parse_args()
+
+    pool_size = 1 if args.server == "fastag" else args.pool
+    proc = None
+    workdir = tempfile.TemporaryDirectory()
+    if args.server:
+        proc = start_server(args.server, "json", workdir.name, args.port)
+
+    try:
+        tag = f"demo-{int(time.time())}"
+        accounts = [f"{tag}-{i}" for i in range(args.accounts)]
+        requests = [('credit' if i % 2 else 'debit', accounts[i // 2 % len(accounts)], 1 + i % 7)
+                    for i in range(args.requests)]
+
+        with WalletClient(args.host, args.port, pool_size) as client:
+            for account in accounts:
+                client.register(account)
+            print(f"{accounts[0]}: credit -> {client.credit(accounts[0], 500)}, "
+                  f"debit -> {client.debit(accounts[0], 200)}", file=sys.stderr)
+            try:
+                client.debit(accounts[0], 10**6)
+            except TransactionRejected as e:
+                print(f"refused as expected: {e}", file=sys.stderr)
+            start = time.perf_counter()
+            results = client.pipeline(requests)
+            sync_rate = len(requests) / (time.perf_counter() - start)
+
+        async def run_async():
+            async with AsyncWalletClient(args.host, args.port, pool_size) as client:
+                start = time.perf_counter()
+                results = await client.pipeline(requests)
+                return results, len(requests) / (time.perf_counter() - start)
+
+        async_results, async_rate = asyncio.run(run_async())
+        print(json.dumps({
+            "requests": len(requests),
+            "pool_size": pool_size,
+            "sync_requests_per_sec": round(sync_rate, 1),
+            "async_requests_per_sec": round(async_rate, 1),
+            "refused": sum(isinstance(r, WalletError) for r in results + async_results),
+        }, indent=2))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        workdir.cleanup()